@@ -1,66 +1,149 @@
 import topo
 
-# utility function
-def _findMinVertex(dist, sptSet):
-    min = 0x3f3f3f3f
-
-    for d in range(len(dist)):
-        if dist[d] < min and sptSet[d] is False:
-            min = dist[d]
-            minIndex = d
-    return minIndex
-
-# @Dijkstra: Calculate shortest path for each pair of server, and return a list of path length
-# @src: source node
-# @graph: a list composed of switch & server node
-# @servers: a list of server
-def _Dijkstra(src, graph, servers):
-    MAX = 0x3f3f3f3f
-    vertices = len(graph)
-    path = []
-
-    dist = [MAX]*vertices
-    srcIndex = graph.index(src)
-    dist[srcIndex] = 0
-    sptSet = [False]*vertices
-
-    for i in range(vertices):
-        currIndex = _findMinVertex(dist, sptSet)
-
-        sptSet[currIndex] = True
-
-        # update current node neighbors
-        for adj in graph[currIndex].edges:
-            adjIndex = graph.index(adj.right_node) # lnode is current node itself
-            if dist[adjIndex] > 0 and sptSet[adjIndex] is False and dist[adjIndex] > dist[currIndex] + 1:
-                # each edge weight is 1
-                dist[adjIndex] = dist[currIndex] + 1
-
-    # log host distance
-    for server in servers:
-        if server == src: # discard itself
-            continue
-        idx = graph.index(server)
-        path.append(dist[idx])
-    return path
+import multiprocessing
+
+import numpy as np
+
+from graph import Graph, iter_bfs_distances
+
+# Graph shared read-only with forked histogram workers
+_graph = None
+
+class PathLengthHistogram:
+    """Number of server pairs per path length, accumulated batch by batch.
+
+    Buckets grow with the longest length seen, so memory stays proportional
+    to the diameter, and histograms of different workers can be merged.
+    Unreachable pairs (length -1) are counted apart.
+    """
+
+    def __init__(self):
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.unreachable = 0
+
+    def add(self, lengths, weights=None):
+        lengths = np.asarray(lengths, dtype=np.int64).ravel()
+        reachable = lengths >= 0
+        if weights is not None:
+            weights = np.asarray(weights).ravel()
+            self.unreachable += int(weights[~reachable].sum())
+            weights = weights[reachable]
+        else:
+            self.unreachable += int(np.count_nonzero(~reachable))
+
+        counts = np.bincount(lengths[reachable], weights=weights)
+        self._grow(len(counts))
+        self.counts[: len(counts)] += counts.astype(np.int64)
+        return self
+
+    def merge(self, other):
+        self._grow(len(other.counts))
+        self.counts[: len(other.counts)] += other.counts
+        self.unreachable += other.unreachable
+        return self
+
+    def _grow(self, size):
+        if size > len(self.counts):
+            grown = np.zeros(size, dtype=np.int64)
+            grown[: len(self.counts)] = self.counts
+            self.counts = grown
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def fractions(self):
+        return self.counts / max(self.total, 1)
+
+    def tolist(self, minlength=10):
+        return self.counts.tolist() + [0] * (minlength - len(self.counts))
+
+# @serverPathLengthHistogram: stream server-to-server path lengths into a histogram
+# @graph: CSR graph composed of switch & server node
+# @processes: number of forked workers, each handling a share of the sources
+def serverPathLengthHistogram(graph, processes=1, batch_size=256):
+    global _graph
+    _graph = graph
+
+    chunks = np.array_split(graph.servers, processes)
+    if processes == 1:
+        return _serverHistogramWorker((chunks[0], batch_size))
+
+    context = multiprocessing.get_context("fork")
+    with context.Pool(processes) as pool:
+        histograms = pool.map(
+            _serverHistogramWorker, [(chunk, batch_size) for chunk in chunks]
+        )
+
+    result = PathLengthHistogram()
+    for histogram in histograms:
+        result.merge(histogram)
+    return result
+
+# @switchPathLengthHistogram: same histogram as serverPathLengthHistogram from switch distances only
+# Server distance is switch distance + 2, so every (switch_i, switch_j) cell counts
+# servers_i * servers_j pairs, and servers on the same switch are servers_i * (servers_i - 1)
+# pairs at length 2. Cost is O(W^2) for W switches instead of a search per server.
+# @graph: CSR graph composed of switch & server node
+def switchPathLengthHistogram(graph, batch_size=256):
+    multiplicity = graph.servers_per_switch().astype(np.int64)
+    # only switches with servers matter, e.g. the edge layer of a fat-tree
+    hosts = np.flatnonzero(multiplicity)
+    multiplicity = multiplicity[hosts]
+    adjacency = graph.adjacency_matrix()
+
+    histogram = PathLengthHistogram()
+    start = 0
+    for rows in iter_bfs_distances(adjacency, hosts, hosts, batch_size):
+        batch = np.arange(start, start + len(rows))
+        diagonal = (np.arange(len(rows)), batch)
+        weights = np.outer(multiplicity[batch], multiplicity)
+        lengths = np.where(rows >= 0, rows + 2, -1)
+        lengths[diagonal] = 2
+        weights[diagonal] = multiplicity[batch] * (multiplicity[batch] - 1)
+        histogram.add(lengths, weights)
+        start += len(rows)
+    return histogram
+
+# @fattreePathLengthHistogram: same histogram as switchPathLengthHistogram for a fat-tree,
+# from the closed-form pair counts of topo.FattreeModel without building a graph
+# @num_ports: number of ports per switch (k)
+def fattreePathLengthHistogram(num_ports):
+    counts = topo.FattreeModel(num_ports).pair_counts()
+    return PathLengthHistogram().add(list(counts), list(counts.values()))
+
+def _serverHistogramWorker(task):
+    sources, batch_size = task
+    histogram = PathLengthHistogram()
+    adjacency = _graph.adjacency_matrix()
+    for rows in iter_bfs_distances(adjacency, sources, _graph.servers, batch_size):
+        # length 0 is the server itself
+        histogram.add(rows[rows != 0])
+    return histogram
+
+# @serverDistanceMatrix: hop distance between every pair of servers
+# @graph: CSR graph composed of switch & server node
+def serverDistanceMatrix(graph):
+    servers = graph.servers
+    return graph.hop_distances(servers, servers)
+
+# @statisticDistanceMatrix: number of ordered server pairs per path length
+# @distanceMatrix: matrix returned by serverDistanceMatrix
+def statisticDistanceMatrix(distanceMatrix):
+    offDiagonal = ~np.eye(len(distanceMatrix), dtype=bool)
+    return PathLengthHistogram().add(distanceMatrix[offDiagonal]).tolist()
 
 def findShortestPath(switchList, servers):
     # Graph = switch node + server node
-    Graph = []
-    Graph.extend(switchList)
-    Graph.extend(servers)
+    graph = Graph.from_nodes(switchList, servers)
 
-    shortestPathList = []
-    for server in servers:
-        li = _Dijkstra(server, Graph, servers)
-        shortestPathList.extend(li)
-    return shortestPathList
+    distanceMatrix = serverDistanceMatrix(graph)
+    offDiagonal = ~np.eye(len(distanceMatrix), dtype=bool)
+    return distanceMatrix[offDiagonal].tolist()
 
 def statisticPathResult(shortestPathList):
     
-    result = [0]*10
-    for length in shortestPathList:
-        result[length]+=1
+    result = PathLengthHistogram().add(shortestPathList).tolist()
 
     # print result
     # for idx, val in enumerate(result):
@@ -0,0 +1,150 @@
+# Copyright 2021 Lin Wang
+
+# This code is part of the Advanced Computer Networks course at Vrije
+# Universiteit Amsterdam.
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from typing import List, Set
+
+import numpy as np
+import scipy.sparse as sp
+
+from graph import Graph, bfs_distances
+
+# Internal marker for unreachable pairs, small enough that adding two of
+# them does not overflow int32.
+_INFINITY = 1 << 28
+
+
+class DynamicDistances:
+    """Switch-to-switch hop distances kept up to date under link changes.
+
+    Every server hangs off one switch, so the distance between two servers
+    is the distance between their switches plus two.
+
+    Adding a link only shortens paths that cross it. The affected sources
+    are those whose distances to the two endpoints differ by more than one,
+    and their rows are fixed with one vectorized minimum. Removing a link
+    can only lengthen paths from sources that have it on their shortest-path
+    DAG, i.e. whose distances to the endpoints differ by exactly one. Only
+    those sources are searched again, in one batched BFS.
+    """
+
+    def __init__(self, graph: "Graph") -> None:
+        num_switches = graph.num_switches
+        self.num_switches = num_switches
+        self.adjacency: List[Set[int]] = [set() for _ in range(num_switches)]
+        for u, v in graph.links.tolist():
+            if v < num_switches:
+                self.adjacency[u].add(v)
+                self.adjacency[v].add(u)
+
+        # Number of rows recomputed or patched so far.
+        self.num_updated_sources = 0
+
+        switches = graph.switches
+        distances = graph.hop_distances(switches, switches).astype(np.int32)
+        distances[distances < 0] = _INFINITY
+        self._distances = np.full(
+            (max(num_switches, 1), max(num_switches, 1)), _INFINITY, dtype=np.int32
+        )
+        self._distances[:num_switches, :num_switches] = distances
+
+    @property
+    def _view(self) -> np.ndarray:
+        return self._distances[: self.num_switches, : self.num_switches]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Copy of the distance matrix, -1 for unreachable pairs."""
+        view = self._view
+        return np.where(view >= _INFINITY, -1, view).astype(np.int16)
+
+    def distance(self, u: int, v: int) -> int:
+        distance = int(self._distances[u, v])
+        return -1 if distance >= _INFINITY else distance
+
+    def add_switch(self) -> int:
+        """Add an isolated switch and return its id."""
+        size = self.num_switches
+        if size == len(self._distances):
+            grown = np.full((2 * size, 2 * size), _INFINITY, dtype=np.int32)
+            grown[:size, :size] = self._distances[:size, :size]
+            self._distances = grown
+
+        self._distances[size, :] = _INFINITY
+        self._distances[:, size] = _INFINITY
+        self._distances[size, size] = 0
+        self.adjacency.append(set())
+        self.num_switches += 1
+        return size
+
+    def add_link(self, u: int, v: int) -> None:
+        if v in self.adjacency[u]:
+            return
+
+        self.adjacency[u].add(v)
+        self.adjacency[v].add(u)
+
+        distances = self._view
+        for leaf, other in ((u, v), (v, u)):
+            if len(self.adjacency[leaf]) == 1:
+                # A switch that was isolated is a leaf: only its own row and
+                # column change.
+                row = np.minimum(distances[other] + 1, _INFINITY)
+                row[leaf] = 0
+                distances[leaf] = row
+                distances[:, leaf] = row
+                self.num_updated_sources += 1
+                return
+
+        to_u, to_v = distances[:, u].copy(), distances[:, v].copy()
+        affected = np.flatnonzero(np.abs(to_u - to_v) > 1)
+        if not len(affected):
+            return
+
+        # A shortest path that improves crosses the new link exactly once.
+        rows = distances[affected]
+        via_u = to_u[affected, None] + 1 + to_v[None, :]
+        via_v = to_v[affected, None] + 1 + to_u[None, :]
+        rows = np.minimum(rows, np.minimum(via_u, via_v))
+        distances[affected] = np.minimum(rows, _INFINITY)
+        distances[:, affected] = distances[affected].T
+        self.num_updated_sources += len(affected)
+
+    def remove_link(self, u: int, v: int) -> None:
+        self.adjacency[u].discard(v)
+        self.adjacency[v].discard(u)
+
+        distances = self._view
+        to_u, to_v = distances[:, u], distances[:, v]
+        affected = np.flatnonzero(
+            (np.abs(to_u - to_v) == 1) & (to_u < _INFINITY) & (to_v < _INFINITY)
+        )
+        if not len(affected):
+            return
+
+        rows = bfs_distances(self._adjacency_matrix(), affected).astype(np.int32)
+        rows[rows < 0] = _INFINITY
+        distances[affected] = rows
+        distances[:, affected] = rows.T
+        self.num_updated_sources += len(affected)
+
+    def _adjacency_matrix(self) -> sp.csr_matrix:
+        rows = [u for u, neighbors in enumerate(self.adjacency) for _ in neighbors]
+        columns = [v for neighbors in self.adjacency for v in neighbors]
+        data = np.ones(len(rows), dtype=np.float32)
+        return sp.csr_matrix(
+            (data, (rows, columns)), shape=(self.num_switches, self.num_switches)
+        )
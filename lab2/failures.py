@@ -0,0 +1,95 @@
+# Copyright 2021 Lin Wang
+
+# This code is part of the Advanced Computer Networks course at Vrije
+# Universiteit Amsterdam.
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import random
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from dynamic import DynamicDistances
+from graph import Graph
+from jellyfish import Topology
+from Utility import PathLengthHistogram
+
+KINDS = ("link", "switch")
+
+
+def failure_sweep(
+    graph: Union["Graph", "Topology"],
+    fractions: Sequence[float],
+    kind: str = "link",
+    seed: Optional[int] = None,
+) -> List[Tuple[float, float, "PathLengthHistogram"]]:
+    """Server path lengths as a growing random share of the network fails.
+
+    Switch links ("link") or whole switches ("switch") fail one by one in a
+    random order drawn from `seed`. Each failure set contains the failures
+    of the previous one. Every failure is a `DynamicDistances.remove_link`,
+    which runs the BFS again only for the sources whose shortest paths
+    crossed the link. For every fraction, in increasing order, the result
+    holds the fraction of server pairs that are disconnected and the
+    histogram of the server path lengths. A failed switch cuts off its
+    servers, and server links never fail.
+    """
+    if isinstance(graph, Topology):
+        graph = graph.graph
+    if kind not in KINDS:
+        raise ValueError("unknown failure kind: {}".format(kind))
+
+    rng = random.Random(seed)
+    distances = DynamicDistances(graph)
+    num_switches = graph.num_switches
+    if kind == "link":
+        order = [tuple(link) for link in graph.links.tolist() if link[1] < num_switches]
+    else:
+        order = list(range(num_switches))
+    rng.shuffle(order)
+
+    alive = np.ones(num_switches, dtype=bool)
+    multiplicity = graph.servers_per_switch().astype(np.int64)
+    results = []
+    failed = 0
+    for fraction in sorted(fractions):
+        target = int(round(fraction * len(order)))
+        for failure in order[failed:target]:
+            if kind == "link":
+                distances.remove_link(*failure)
+            else:
+                alive[failure] = False
+                for neighbor in list(distances.adjacency[failure]):
+                    distances.remove_link(failure, neighbor)
+        failed = max(failed, target)
+
+        histogram = _server_histogram(distances.matrix, multiplicity, alive)
+        pairs = histogram.total + histogram.unreachable
+        results.append((fraction, histogram.unreachable / max(pairs, 1), histogram))
+    return results
+
+
+def _server_histogram(
+    distances: np.ndarray, multiplicity: np.ndarray, alive: np.ndarray
+) -> "PathLengthHistogram":
+    """Server pair path lengths from switch distances, as in
+    `Utility.switchPathLengthHistogram`."""
+    hosts = np.flatnonzero(multiplicity)
+    rows = distances[np.ix_(hosts, hosts)].astype(np.int64)
+    reachable = (rows >= 0) & alive[hosts][:, None] & alive[hosts][None, :]
+    lengths = np.where(reachable, rows + 2, -1)
+
+    weights = np.outer(multiplicity[hosts], multiplicity[hosts])
+    np.fill_diagonal(weights, multiplicity[hosts] * (multiplicity[hosts] - 1))
+    return PathLengthHistogram().add(lengths, weights)
@@ -0,0 +1,133 @@
+# Copyright 2021 Lin Wang
+
+# This code is part of the Advanced Computer Networks course at Vrije
+# Universiteit Amsterdam.
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import random
+from itertools import chain
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import scipy.sparse as sp
+
+from graph import Graph
+from jellyfish import EcmpPaths, PathCache, Topology
+from routing import SCHEMES, permutation
+
+
+def max_min_fair_rates(
+    graph: Union["Graph", "Topology"],
+    flows: Sequence[Sequence[List[int]]],
+    capacity: float = 1.0,
+) -> np.ndarray:
+    """Max-min fair rate of every flow over directed links of `capacity`.
+
+    A flow is a list of paths of node ids and every path is an independent
+    subflow, so a flow gets the sum of the rates of its subflows. Rates are
+    found by progressive filling: all unfrozen subflows grow at the same
+    pace until a link saturates, which freezes the subflows crossing it.
+    Every round is a few sparse products over the subflow x link incidence
+    matrix, and there is at most one round per link.
+    """
+    if isinstance(graph, Topology):
+        graph = graph.graph
+
+    paths = list(chain.from_iterable(flows))
+    owners = np.repeat(np.arange(len(flows)), [len(flow) for flow in flows])
+    incidence = _incidence(graph, paths)
+
+    rates = np.zeros(len(paths))
+    residual = np.full(incidence.shape[1], float(capacity))
+    active = np.asarray(incidence.sum(axis=1)).ravel() > 0
+    while active.any():
+        crossing = incidence.T @ active.astype(np.float64)
+        used = crossing > 0
+        increment = (residual[used] / crossing[used]).min()
+        rates[active] += increment
+        residual[used] -= increment * crossing[used]
+
+        saturated = used & (residual <= 1e-9 * capacity)
+        active &= (incidence @ saturated.astype(np.float64)) == 0
+
+    return np.bincount(owners, weights=rates, minlength=len(flows))
+
+
+def _incidence(graph: "Graph", paths: List[List[int]]) -> sp.csr_matrix:
+    """Subflow x directed edge incidence matrix of a list of paths."""
+    hops = [len(path) - 1 for path in paths]
+    nodes = np.fromiter(chain.from_iterable(paths), dtype=np.int64)
+    is_hop = np.ones(max(len(nodes) - 1, 0), dtype=bool)
+    is_hop[np.cumsum([len(path) for path in paths], dtype=np.int64)[:-1] - 1] = False
+    tails, heads = nodes[:-1][is_hop], nodes[1:][is_hop]
+
+    edge_ids = graph.edge_ids(tails, heads)
+    rows = np.repeat(np.arange(len(paths)), hops)
+    return sp.csr_matrix(
+        (np.ones(len(edge_ids)), (rows, edge_ids)),
+        shape=(len(paths), 2 * graph.num_links),
+    )
+
+
+def flow_paths(
+    graph: Union["Graph", "Topology"],
+    pairs: Sequence[Tuple[int, int]],
+    scheme: str = "shortest",
+    k: int = 8,
+    split: bool = True,
+    seed: Optional[int] = None,
+) -> List[List[List[int]]]:
+    """Path set of every server pair, as reproduce_9.py builds them.
+
+    "shortest" takes the k shortest paths and "ecmp" up to k equal-cost
+    paths. With `split` a flow uses all of its paths, one subflow each, like
+    MPTCP. Otherwise it is hashed onto one of them at random, like a single
+    TCP flow.
+    """
+    if isinstance(graph, Topology):
+        graph = graph.graph
+    if scheme not in SCHEMES:
+        raise ValueError("unknown routing scheme: {}".format(scheme))
+
+    rng = random.Random(seed)
+    if scheme == "shortest":
+        find_paths = PathCache(graph).find_shortest_paths
+    else:
+        find_paths = EcmpPaths(graph).find_paths
+
+    flows = []
+    for source, sink in pairs:
+        paths = find_paths(source, sink, k)
+        flows.append(paths if split else [rng.choice(paths)])
+    return flows
+
+
+def permutation_throughput(
+    graph: Union["Graph", "Topology"],
+    scheme: str = "shortest",
+    k: int = 8,
+    split: bool = True,
+    capacity: float = 1.0,
+    seed: Optional[int] = None,
+) -> np.ndarray:
+    """Max-min fair rate of every server under random permutation traffic,
+    the workload of the Jellyfish paper's routing comparison."""
+    if isinstance(graph, Topology):
+        graph = graph.graph
+
+    sources, sinks, _ = sp.find(permutation(graph.num_servers, seed))
+    servers = graph.servers
+    pairs = list(zip(servers[sources].tolist(), servers[sinks].tolist()))
+    flows = flow_paths(graph, pairs, scheme, k, split, seed)
+    return max_min_fair_rates(graph, flows, capacity)
@@ -0,0 +1,686 @@
+# Copyright 2021 Lin Wang
+
+# This code is part of the Advanced Computer Networks course at Vrije
+# Universiteit Amsterdam.
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import heapq
+import json
+from collections import defaultdict
+from itertools import count
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+
+SWITCH = 0
+SERVER = 1
+
+
+class Graph:
+    """Frozen integer-indexed adjacency of a topology in CSR form.
+
+    Switches take the ids ``0 .. num_switches - 1`` and servers follow them,
+    so the neighbors of node ``u`` are ``neighbors[offsets[u]:offsets[u + 1]]``.
+
+    Every undirected link has a stable id, its row in ``links`` (sorted by
+    endpoints, lower endpoint first). The two directions of link ``i`` have
+    the directed ids ``2 * i`` (low to high) and ``2 * i + 1`` (high to low).
+    ``slot_links`` gives the link id of every CSR slot.
+    """
+
+    def __init__(
+        self,
+        offsets: np.ndarray,
+        neighbors: np.ndarray,
+        node_type: np.ndarray,
+        node_index: np.ndarray,
+        nodes: Optional[List[Any]] = None,
+        links: Optional[np.ndarray] = None,
+        slot_links: Optional[np.ndarray] = None,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.node_type = node_type
+        self.node_index = node_index
+        self.nodes = nodes
+        self.meta = dict(meta or {})
+        self._ids = None
+        self._search = None
+        self._lists = None
+
+        if links is None or slot_links is None:
+            links, slot_links = self._derive_links()
+        self.links = links
+        self.slot_links = slot_links
+
+    def _derive_links(self) -> Tuple[np.ndarray, np.ndarray]:
+        # CSR slots are sorted by (source, neighbor), so the forward slots
+        # list the links in id order and reverse slots are found by search.
+        sources = self.slot_sources
+        neighbors = self.neighbors.astype(np.int64)
+        forward = sources < neighbors
+        links = np.stack([sources[forward], neighbors[forward]], axis=1)
+        forward_keys = self.slot_keys[forward]
+        slot_links = np.where(
+            forward,
+            np.cumsum(forward) - 1,
+            np.searchsorted(forward_keys, neighbors * self.num_nodes + sources),
+        )
+        return links.astype(np.int32), slot_links.astype(np.int32)
+
+    @property
+    def slot_sources(self) -> np.ndarray:
+        """Source node of every CSR slot."""
+        return np.repeat(
+            np.arange(self.num_nodes, dtype=np.int64), np.diff(self.offsets)
+        )
+
+    @property
+    def slot_keys(self) -> np.ndarray:
+        """Sorted ``source * num_nodes + neighbor`` key of every CSR slot."""
+        return self.slot_sources * self.num_nodes + self.neighbors
+
+    def _python_lists(self) -> Tuple[List[int], List[int], List[int]]:
+        # Flat python copies of the CSR arrays for the scalar traversals,
+        # indexing numpy arrays element by element is much slower. They are
+        # built on first use so loading a stored graph stays cheap.
+        if self._lists is None:
+            self._lists = (
+                self.offsets.tolist(),
+                self.neighbors.tolist(),
+                self.slot_links.tolist(),
+            )
+        return self._lists
+
+    @property
+    def _offsets(self) -> List[int]:
+        return self._python_lists()[0]
+
+    @property
+    def _neighbors(self) -> List[int]:
+        return self._python_lists()[1]
+
+    @property
+    def _slot_links(self) -> List[int]:
+        return self._python_lists()[2]
+
+    @classmethod
+    def from_edges(
+        cls,
+        node_type: Sequence[int],
+        node_index: Sequence[int],
+        edges: Iterable[Sequence[int]],
+        nodes: Optional[List[Any]] = None,
+    ) -> "Graph":
+        """Build the graph from undirected (u, v) id pairs."""
+        node_type = np.asarray(node_type, dtype=np.int8)
+        node_index = np.asarray(node_index, dtype=np.int32)
+        num_nodes = len(node_type)
+
+        edges = np.asarray(list(edges), dtype=np.int32).reshape(-1, 2)
+        src = np.concatenate([edges[:, 0], edges[:, 1]])
+        dst = np.concatenate([edges[:, 1], edges[:, 0]])
+        order = np.lexsort((dst, src))
+
+        offsets = np.zeros(num_nodes + 1, dtype=np.int32)
+        np.cumsum(np.bincount(src, minlength=num_nodes), out=offsets[1:])
+        neighbors = np.ascontiguousarray(dst[order], dtype=np.int32)
+
+        return cls(offsets, neighbors, node_type, node_index, nodes)
+
+    @classmethod
+    def from_nodes(cls, switches: Sequence[Any], servers: Sequence[Any]) -> "Graph":
+        """Build the graph from node objects holding an ``edges`` list.
+
+        Both edge conventions in this directory are accepted: one ``Edge`` per
+        direction (jellyfish.py) and one ``Edge`` shared by both ends (topo.py).
+        """
+        nodes = list(switches) + list(servers)
+        ids = {id(node): i for i, node in enumerate(nodes)}
+
+        edges = set()
+        for u, node in enumerate(nodes):
+            for edge in node.edges:
+                other = edge.right_node if edge.left_node is node else edge.left_node
+                v = ids[id(other)]
+                if u != v:
+                    edges.add((min(u, v), max(u, v)))
+
+        node_type = [SWITCH] * len(switches) + [SERVER] * len(servers)
+        node_index = [
+            getattr(node, "index", i) for i, node in enumerate(switches)
+        ] + [getattr(node, "index", i) for i, node in enumerate(servers)]
+        return cls.from_edges(node_type, node_index, sorted(edges), nodes)
+
+    @property
+    def num_nodes(self) -> int:
+        return len(self.node_type)
+
+    @property
+    def num_switches(self) -> int:
+        return int(np.count_nonzero(self.node_type == SWITCH))
+
+    @property
+    def num_servers(self) -> int:
+        return self.num_nodes - self.num_switches
+
+    @property
+    def num_links(self) -> int:
+        """Number of undirected links."""
+        return len(self.neighbors) // 2
+
+    @property
+    def switches(self) -> np.ndarray:
+        return np.flatnonzero(self.node_type == SWITCH).astype(np.int32)
+
+    @property
+    def servers(self) -> np.ndarray:
+        return np.flatnonzero(self.node_type == SERVER).astype(np.int32)
+
+    def adjacency_matrix(self) -> sp.csr_matrix:
+        """Sparse adjacency matrix sharing the CSR index arrays."""
+        data = np.ones(len(self.neighbors), dtype=np.float32)
+        return sp.csr_matrix(
+            (data, self.neighbors, self.offsets),
+            shape=(self.num_nodes, self.num_nodes),
+        )
+
+    def hop_distances(
+        self,
+        sources: Optional[Sequence[int]] = None,
+        targets: Optional[Sequence[int]] = None,
+        batch_size: int = 256,
+    ) -> np.ndarray:
+        """Hop distance matrix from every source to every target.
+
+        Runs a level-synchronous BFS from a batch of sources at once, each
+        level being one sparse-dense product with the adjacency matrix.
+        Unreachable pairs are -1. The dtype is the smallest signed integer
+        that can hold the longest possible distance.
+        """
+        num_nodes = self.num_nodes
+        sources = np.arange(num_nodes) if sources is None else sources
+        return bfs_distances(self.adjacency_matrix(), sources, targets, batch_size)
+
+    def degree(self, u: int) -> int:
+        return self._offsets[u + 1] - self._offsets[u]
+
+    def adjacent(self, u: int) -> np.ndarray:
+        """Neighbor ids of node ``u`` as a view into the CSR array."""
+        return self.neighbors[self.offsets[u] : self.offsets[u + 1]]
+
+    @property
+    def server_switches(self) -> np.ndarray:
+        """Switch every server hangs off, in server id order."""
+        return self.neighbors[self.offsets[self.servers]]
+
+    def servers_per_switch(self) -> np.ndarray:
+        return np.bincount(self.server_switches, minlength=self.num_switches)
+
+    def switch_of(self, u: int) -> int:
+        """Switch a server hangs off, or the node itself for a switch."""
+        if self.node_type[u] == SWITCH:
+            return u
+        return self._neighbors[self._offsets[u]]
+
+    def slot(self, u: int, v: int) -> int:
+        """CSR slot of the edge u->v."""
+        neighbors = self._neighbors
+        for slot in range(self._offsets[u], self._offsets[u + 1]):
+            if neighbors[slot] == v:
+                return slot
+        raise KeyError(f"no edge {u}->{v}")
+
+    def link_id(self, u: int, v: int) -> int:
+        """Id of the undirected link between u and v."""
+        return self._slot_links[self.slot(u, v)]
+
+    def edge_id(self, u: int, v: int) -> int:
+        """Directed id of the edge u->v."""
+        return 2 * self.link_id(u, v) + (u > v)
+
+    def link_ids(self, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+        """Vectorized `link_id` over arrays of endpoints."""
+        slot_keys = self.slot_keys
+        keys = np.asarray(u, dtype=np.int64) * self.num_nodes + np.asarray(v)
+        slots = np.minimum(np.searchsorted(slot_keys, keys), len(slot_keys) - 1)
+        if np.any(slot_keys[slots] != keys):
+            raise KeyError("no such edge")
+        return self.slot_links[slots]
+
+    def edge_ids(self, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+        """Vectorized `edge_id` over arrays of endpoints."""
+        u = np.asarray(u, dtype=np.int64)
+        v = np.asarray(v, dtype=np.int64)
+        return 2 * self.link_ids(u, v).astype(np.int64) + (u > v)
+
+    def switch_slots(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Tail, head and directed edge id of every switch-to-switch slot."""
+        num_switches = self.num_switches
+        tails = self.slot_sources
+        heads = self.neighbors.astype(np.int64)
+        inside = (tails < num_switches) & (heads < num_switches)
+        edge_ids = 2 * self.slot_links.astype(np.int64) + (tails > heads)
+        return tails[inside], heads[inside], edge_ids[inside]
+
+    def edge_endpoints(self, edge_id: int) -> Tuple[int, int]:
+        """Inverse of `edge_id`."""
+        u, v = self.links[edge_id >> 1].tolist()
+        return (v, u) if edge_id & 1 else (u, v)
+
+    def path_links(self, path: Sequence[int]) -> List[int]:
+        """Link ids along a path of node ids."""
+        return [self.link_id(u, v) for u, v in zip(path, path[1:])]
+
+    def is_neighbor(self, u: int, v: int) -> bool:
+        return v in self._neighbors[self._offsets[u] : self._offsets[u + 1]]
+
+    @property
+    def search(self) -> "ShortestPathSearch":
+        """Shared BFS engine of this graph."""
+        if self._search is None:
+            self._search = ShortestPathSearch(self)
+        return self._search
+
+    def shortest_path(self, source: int, sink: int) -> List[int]:
+        return self.search.find(source, sink)
+
+    def k_shortest_paths(self, source: int, sink: int, k: int) -> List[List[int]]:
+        """Find the k shortest loopless paths with Yen's algorithm.
+        https://en.wikipedia.org/wiki/Yen%27s_algorithm
+
+        Candidates sit in a heap keyed by length (ties in discovery order)
+        and are deduplicated through a set of path tuples. With Lawler's
+        refinement only the spur nodes from the deviation index of the last
+        accepted path onwards are searched, since earlier spur nodes yield
+        candidates that were already generated.
+        """
+        search = self.search
+        first = search.find(source, sink)
+        if not first:
+            return []
+
+        shortest_paths = [first]
+        deviations = [0]
+        seen: Set[Tuple[int, ...]] = {tuple(first)}
+        candidates: List[Tuple[int, int, Tuple[int, ...], int]] = []
+        tie_breaker = count()
+
+        # Next hops taken after each root path by the accepted paths, so the
+        # edges to exclude for a spur node are a single lookup.
+        next_hops: Dict[Tuple[int, ...], Set[int]] = defaultdict(set)
+        _add_prefixes(next_hops, first)
+
+        while len(shortest_paths) < k:
+            last_shortest_path = shortest_paths[-1]
+            for spur_node_index in range(deviations[-1], len(last_shortest_path) - 1):
+                root_path = last_shortest_path[: spur_node_index + 1]
+                spur_node = root_path[-1]
+                for next_hop in next_hops[tuple(root_path)]:
+                    search.exclude_edge(spur_node, next_hop)
+                for node in root_path[:-1]:
+                    search.exclude_node(node)
+
+                spur_path = search.find(spur_node, sink)
+                search.clear()
+                if not spur_path:
+                    continue
+
+                candidate = tuple(root_path[:-1] + spur_path)
+                if candidate not in seen:
+                    seen.add(candidate)
+                    heapq.heappush(
+                        candidates,
+                        (len(candidate), next(tie_breaker), candidate, spur_node_index),
+                    )
+
+            if not candidates:
+                break
+
+            _, _, shortest_path, deviation = heapq.heappop(candidates)
+            shortest_paths.append(list(shortest_path))
+            deviations.append(deviation)
+            _add_prefixes(next_hops, shortest_path)
+
+        return shortest_paths
+
+    def shortest_path_dag(self, sink: int) -> "ShortestPathDAG":
+        return ShortestPathDAG(self, sink)
+
+    def id_of(self, node: Any) -> int:
+        """Map a node object of the source topology to its id."""
+        if self._ids is None:
+            self._ids = {n: i for i, n in enumerate(self.nodes or [])}
+        return self._ids[node]
+
+    def node(self, u: int) -> Any:
+        """Map an id back to the node object of the source topology."""
+        return self.nodes[u]
+
+    def to_nodes(self, path: Iterable[int]) -> List[Any]:
+        nodes = self.nodes
+        return [nodes[u] for u in path]
+
+    def save(self, path: str, **meta: Any) -> None:
+        """Write the graph and its metadata to a binary topology file.
+
+        The file holds a JSON header followed by the raw CSR arrays at
+        aligned offsets, so `load` can map them without reading them.
+        """
+        arrays = {name: np.ascontiguousarray(getattr(self, name)) for name in _ARRAYS}
+        header = {"meta": {**self.meta, **meta}, "arrays": {}}
+
+        position = 0
+        for name, array in arrays.items():
+            header["arrays"][name] = {
+                "dtype": array.dtype.str,
+                "shape": list(array.shape),
+                "offset": position,
+            }
+            position = _align(position + array.nbytes)
+
+        # Leave room for the offsets growing by a few digits each.
+        encoded = json.dumps(header).encode()
+        data_start = _align(len(_MAGIC) + 8 + len(encoded) + 16 * len(arrays))
+        for entry in header["arrays"].values():
+            entry["offset"] += data_start
+        encoded = json.dumps(header).encode().ljust(data_start - len(_MAGIC) - 8)
+
+        with open(path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(len(encoded).to_bytes(8, "little"))
+            f.write(encoded)
+            for name, array in arrays.items():
+                f.seek(header["arrays"][name]["offset"])
+                f.write(array.tobytes())
+
+    @classmethod
+    def load(cls, path: str) -> "Graph":
+        """Open a topology file written by `save`.
+
+        The arrays are read-only memory maps, so processes opening the same
+        file share its pages instead of holding private copies.
+        """
+        header = read_header(path)
+        arrays = {
+            name: np.memmap(
+                path,
+                dtype=np.dtype(entry["dtype"]),
+                mode="r",
+                offset=entry["offset"],
+                shape=tuple(entry["shape"]),
+            )
+            if entry["shape"][0]
+            else np.empty(entry["shape"], dtype=np.dtype(entry["dtype"]))
+            for name, entry in header["arrays"].items()
+        }
+        return cls(meta=header["meta"], **arrays)
+
+
+class ShortestPathDAG:
+    """All shortest paths towards one sink.
+
+    One BFS from the sink gives every node's distance; the next hops of a
+    node are its neighbors one hop closer. The number of equal-cost paths
+    is counted by dynamic programming in BFS order, and paths are listed
+    lazily by walking the DAG depth first, so no spur searches are needed.
+    """
+
+    def __init__(self, graph: "Graph", sink: int) -> None:
+        self.graph = graph
+        self.sink = sink
+        offsets, neighbors = graph._offsets, graph._neighbors
+
+        distance = [-1] * graph.num_nodes
+        num_paths = [0] * graph.num_nodes
+        distance[sink] = 0
+        num_paths[sink] = 1
+        order = [sink]
+        for u in order:
+            next_distance = distance[u] + 1
+            for v in neighbors[offsets[u] : offsets[u + 1]]:
+                if distance[v] == -1:
+                    distance[v] = next_distance
+                    order.append(v)
+                if distance[v] == next_distance:
+                    num_paths[v] += num_paths[u]
+
+        self.distance = distance
+        self.num_paths = num_paths
+
+    def next_hops(self, u: int) -> List[int]:
+        offsets, neighbors = self.graph._offsets, self.graph._neighbors
+        closer = self.distance[u] - 1
+        distance = self.distance
+        return [
+            v for v in neighbors[offsets[u] : offsets[u + 1]] if distance[v] == closer
+        ]
+
+    def paths(self, source: int, k: Optional[int] = None) -> Iterator[List[int]]:
+        """Yield up to k shortest paths from source to the sink."""
+        if self.distance[source] < 0 or k == 0:
+            return
+
+        found = 0
+        path = [source]
+        stack = [iter(self.next_hops(source))]
+        while stack:
+            if path[-1] == self.sink:
+                yield list(path)
+                found += 1
+                if found == k:
+                    return
+                path.pop()
+                stack.pop()
+                continue
+
+            next_hop = next(stack[-1], None)
+            if next_hop is None:
+                path.pop()
+                stack.pop()
+                continue
+
+            path.append(next_hop)
+            stack.append(iter(self.next_hops(next_hop)))
+
+
+_MAGIC = b"ACNTOPO1"
+_ARRAYS = ("offsets", "neighbors", "node_type", "node_index", "links", "slot_links")
+
+
+def _align(position: int, alignment: int = 64) -> int:
+    return (position + alignment - 1) // alignment * alignment
+
+
+def read_header(path: str) -> Dict[str, Any]:
+    """Read the JSON header of a topology file without mapping its arrays."""
+    with open(path, "rb") as f:
+        if f.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f"{path} is not a topology file")
+        length = int.from_bytes(f.read(8), "little")
+        return json.loads(f.read(length).decode())
+
+
+def _add_prefixes(
+    next_hops: Dict[Tuple[int, ...], Set[int]], path: Sequence[int]
+) -> None:
+    for i in range(len(path) - 1):
+        next_hops[tuple(path[: i + 1])].add(path[i + 1])
+
+
+def bfs_distances(
+    adjacency: sp.csr_matrix,
+    sources: Sequence[int],
+    targets: Optional[Sequence[int]] = None,
+    batch_size: int = 256,
+) -> np.ndarray:
+    """Hop distances from sources to targets over a sparse adjacency matrix.
+
+    See `Graph.hop_distances`; all nodes are targets by default.
+    """
+    num_nodes = adjacency.shape[0]
+    num_targets = num_nodes if targets is None else len(targets)
+    result = np.empty((len(sources), num_targets), dtype=_distance_dtype(num_nodes))
+    start = 0
+    for rows in iter_bfs_distances(adjacency, sources, targets, batch_size):
+        result[start : start + len(rows)] = rows
+        start += len(rows)
+    return result
+
+
+def iter_bfs_distances(
+    adjacency: sp.csr_matrix,
+    sources: Sequence[int],
+    targets: Optional[Sequence[int]] = None,
+    batch_size: int = 256,
+) -> Iterator[np.ndarray]:
+    """Yield the rows of `bfs_distances` one batch of sources at a time."""
+    num_nodes = adjacency.shape[0]
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.arange(num_nodes) if targets is None else np.asarray(targets)
+    dtype = _distance_dtype(num_nodes)
+
+    for start in range(0, len(sources), batch_size):
+        batch = sources[start : start + batch_size]
+        columns = np.arange(len(batch))
+
+        distances = np.full((num_nodes, len(batch)), -1, dtype=dtype)
+        distances[batch, columns] = 0
+        visited = distances == 0
+        frontier = visited.astype(np.float32)
+
+        level = 0
+        while True:
+            reached = (adjacency @ frontier) > 0
+            reached &= ~visited
+            if not reached.any():
+                break
+
+            level += 1
+            distances[reached] = level
+            visited |= reached
+            frontier = reached.astype(np.float32)
+
+        yield distances[targets].T
+
+
+def _distance_dtype(num_nodes: int) -> np.dtype:
+    for dtype in (np.int8, np.int16):
+        if num_nodes <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int32)
+
+
+class ShortestPathSearch:
+    """Breadth-first shortest path queries on a `Graph`.
+
+    All links have unit weight, so a BFS that stops at the sink is enough.
+    The distance, parent and queue arrays are allocated once and reused: a
+    per-query stamp marks which entries are valid, so nothing is cleared
+    between queries. Excluded edges and nodes are byte masks indexed by
+    CSR slot and node id, so an edge is excluded in one direction only.
+    """
+
+    def __init__(self, graph: "Graph") -> None:
+        self.graph = graph
+        num_nodes = graph.num_nodes
+        self.distance = [0] * num_nodes
+        self.parent = [-1] * num_nodes
+        self.excluded_slots = bytearray(len(graph.neighbors))
+        self.excluded_nodes = bytearray(num_nodes)
+
+        self._queue = [0] * num_nodes
+        self._stamp = [0] * num_nodes
+        self._epoch = 0
+        self._touched_slots: List[int] = []
+        self._touched_nodes: List[int] = []
+
+    def exclude_edge(self, u: int, v: int) -> None:
+        """Exclude the directed edge u->v."""
+        slot = self.graph.slot(u, v)
+        self.excluded_slots[slot] = 1
+        self._touched_slots.append(slot)
+
+    def exclude_node(self, u: int) -> None:
+        self.excluded_nodes[u] = 1
+        self._touched_nodes.append(u)
+
+    def clear(self) -> None:
+        """Drop all exclusions, touching only the entries that were set."""
+        for slot in self._touched_slots:
+            self.excluded_slots[slot] = 0
+        for u in self._touched_nodes:
+            self.excluded_nodes[u] = 0
+        self._touched_slots.clear()
+        self._touched_nodes.clear()
+
+    def find(self, source: int, sink: int) -> List[int]:
+        """Return one shortest path from source to sink as node ids.
+
+        An empty list means the sink is unreachable under the current
+        exclusions.
+        """
+        if source == sink:
+            return [source]
+
+        graph = self.graph
+        offsets, neighbors = graph._offsets, graph._neighbors
+        excluded_slots, excluded_nodes = self.excluded_slots, self.excluded_nodes
+        distance, parent, queue, stamp = (
+            self.distance,
+            self.parent,
+            self._queue,
+            self._stamp,
+        )
+        self._epoch += 1
+        epoch = self._epoch
+
+        stamp[source] = epoch
+        distance[source] = 0
+        parent[source] = -1
+        queue[0] = source
+        head, tail = 0, 1
+
+        while head < tail:
+            u = queue[head]
+            head += 1
+            next_distance = distance[u] + 1
+            for slot in range(offsets[u], offsets[u + 1]):
+                if excluded_slots[slot]:
+                    continue
+
+                v = neighbors[slot]
+                if stamp[v] == epoch or excluded_nodes[v]:
+                    continue
+
+                stamp[v] = epoch
+                distance[v] = next_distance
+                parent[v] = u
+                if v == sink:
+                    return self._path_to(sink)
+
+                queue[tail] = v
+                tail += 1
+
+        return []
+
+    def _path_to(self, node: int) -> List[int]:
+        parent = self.parent
+        path = []
+        while node != -1:
+            path.append(node)
+            node = parent[node]
+        return path[::-1]
@@ -0,0 +1,166 @@
+# Copyright 2021 Lin Wang
+
+# This code is part of the Advanced Computer Networks course at Vrije
+# Universiteit Amsterdam.
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import multiprocessing
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from graph import Graph, bfs_distances
+from jellyfish import EcmpPaths, Topology
+
+# Graph shared read-only with forked workers.
+_graph = None
+
+
+def ecmp_link_load(
+    graph: Union["Graph", "Topology"], k: Optional[int] = None, processes: int = 1
+) -> np.ndarray:
+    """Exact expected load of every directed edge under ECMP routing.
+
+    Every ordered pair of servers sends one unit of traffic, split evenly
+    over the equal-cost shortest paths between them (or over the first k of
+    them, in the order `EcmpPaths` lists them). The result is indexed by
+    directed edge id (see `Graph`).
+
+    Switch links are computed at switch level with a Brandes-style
+    dependency accumulation over the BFS DAG of every source switch, where
+    the servers of a switch weight it as a target and as a source. This is
+    O(W * E) for W switches and needs no sampling. With k, pairs that have
+    more than k equal-cost paths are left out of the accumulation and their
+    first k paths are walked explicitly. Sources can be split over forked
+    worker processes.
+    """
+    if isinstance(graph, Topology):
+        graph = graph.graph
+
+    global _graph
+    _graph = graph
+
+    switches = np.flatnonzero(graph.servers_per_switch())
+    chunks = [chunk for chunk in np.array_split(switches, processes) if len(chunk)]
+    if processes == 1:
+        loads = [_source_loads((chunk, k)) for chunk in chunks]
+    else:
+        context = multiprocessing.get_context("fork")
+        with context.Pool(processes) as pool:
+            loads = pool.map(_source_loads, [(chunk, k) for chunk in chunks])
+
+    load = np.zeros(2 * graph.num_links)
+    for chunk_load in loads:
+        load += chunk_load
+
+    # Every server sends to and receives from all other servers over its
+    # own link.
+    servers = graph.servers
+    load[graph.edge_ids(servers, graph.server_switches)] += graph.num_servers - 1
+    load[graph.edge_ids(graph.server_switches, servers)] += graph.num_servers - 1
+    return load
+
+
+def link_load(directed_load: np.ndarray) -> np.ndarray:
+    """Sum the two directions of every link."""
+    return directed_load[0::2] + directed_load[1::2]
+
+
+def _source_loads(task: Tuple[Sequence[int], Optional[int]]) -> np.ndarray:
+    sources, k = task
+    graph = _graph
+    num_switches = graph.num_switches
+    multiplicity = graph.servers_per_switch().astype(np.float64)
+    tails, heads, edge_ids = graph.switch_slots()
+
+    adjacency = graph.adjacency_matrix()[:num_switches, :num_switches]
+    distances = bfs_distances(adjacency, sources).astype(np.int64)
+    ecmp = EcmpPaths(graph) if k is not None else None
+
+    load = np.zeros(2 * graph.num_links)
+    for source, distance in zip(sources, distances):
+        # Slots of the BFS DAG from the source, grouped by the level of
+        # their head.
+        on_dag = (distance[tails] >= 0) & (distance[heads] == distance[tails] + 1)
+        dag_tails, dag_heads = tails[on_dag], heads[on_dag]
+        dag_ids = edge_ids[on_dag]
+        levels = distance[dag_heads]
+        max_level = int(distance.max())
+        by_level = [np.flatnonzero(levels == level) for level in range(max_level + 1)]
+
+        num_paths = np.zeros(num_switches)
+        num_paths[source] = 1
+        for level in range(1, max_level + 1):
+            slots = by_level[level]
+            num_paths += np.bincount(
+                dag_heads[slots],
+                weights=num_paths[dag_tails[slots]],
+                minlength=num_switches,
+            )
+
+        targets = multiplicity.copy()
+        targets[source] = 0
+        if k is not None:
+            too_many = num_paths > k
+            targets[too_many] = 0
+            _add_bounded_paths(
+                graph, ecmp, load, source, np.flatnonzero(too_many), k, multiplicity
+            )
+
+        dependency = np.zeros(num_switches)
+        for level in range(max_level, 0, -1):
+            slots = by_level[level]
+            share = (
+                num_paths[dag_tails[slots]]
+                / num_paths[dag_heads[slots]]
+                * (targets[dag_heads[slots]] + dependency[dag_heads[slots]])
+            )
+            load += np.bincount(
+                dag_ids[slots],
+                weights=multiplicity[source] * share,
+                minlength=len(load),
+            )
+            dependency += np.bincount(
+                dag_tails[slots], weights=share, minlength=num_switches
+            )
+
+    return load
+
+
+def _add_bounded_paths(
+    graph: "Graph",
+    ecmp: "EcmpPaths",
+    load: np.ndarray,
+    source: int,
+    sinks: np.ndarray,
+    k: int,
+    multiplicity: np.ndarray,
+) -> None:
+    """Spread the traffic of pairs with more than k paths over k of them."""
+    hops = []
+    weights = []
+    for sink in sinks.tolist():
+        if not multiplicity[sink]:
+            continue
+
+        paths = ecmp.find_paths(source, sink, k)
+        weight = multiplicity[source] * multiplicity[sink] / len(paths)
+        for path in paths:
+            hops.extend(zip(path, path[1:]))
+            weights.extend([weight] * (len(path) - 1))
+
+    if hops:
+        tails, heads = np.array(hops).T
+        edge_ids = graph.edge_ids(tails, heads)
+        load += np.bincount(edge_ids, weights=weights, minlength=len(load))
@@ -15,18 +15,25 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import argparse
 import topo
 import matplotlib.pyplot as plt
 import numpy as np
 import Utility as ut
+import jellyfish as JF
+from resultcache import ResultCache
 
 # TODO: code for reproducing Figure 1(c) in the jellyfish paper
 
-def generateFigure1c(ft_topo, jf_topo):
-	ft_list = ut.findShortestPath(ft_topo.switchList, ft_topo.servers)
-	jf_list = ut.findShortestPath(jf_topo.switchList, jf_topo.servers)
-	ft_res = ut.statisticPathResult(ft_list)
-	jf_res = ut.statisticPathResult(jf_list)
+def generateFigure1c(num_ports, jf_graph, cache=None):
+	# the fat-tree side is closed-form, so it needs no graph even at k=48
+	ft_res = ut.fattreePathLengthHistogram(num_ports).tolist()
+	if cache is not None:
+		jf_res = cache.memoize(
+			"switchPathLengthHistogram", jf_graph,
+			lambda: ut.switchPathLengthHistogram(jf_graph)).tolist()
+	else:
+		jf_res = ut.switchPathLengthHistogram(jf_graph).tolist()
 
 	ft_data = [x/sum(ft_res) for x in ft_res[1:7]]
 	jf_data = [x/sum(jf_res) for x in jf_res[1:7]]
@@ -50,7 +57,34 @@ def generateFigure1c(ft_topo, jf_topo):
 	plt.show()
 
 
+def parse_args():
+	parser = argparse.ArgumentParser(
+		usage="Usage: python reproduce_1c.py --topology --cache_dir --plot"
+	)
+	parser.add_argument(
+		"--topology",
+		help="Jellyfish topology file to load, or to store the generated topology to",
+		action="store",
+		type=str,
+		default=None,
+	)
+	parser.add_argument(
+		"--cache_dir",
+		help="Directory to memoize the path length histograms in",
+		action="store",
+		type=str,
+		default=None,
+	)
+	parser.add_argument(
+		"--plot",
+		help="Also draw both topologies; Figure 1(c) itself needs no fat-tree graph",
+		action="store_true",
+	)
+	return parser.parse_args()
+
+
 if __name__ == "__main__":
+	args = parse_args()
 	num_servers = 16
 	num_switches = 20
 	num_ports = 4
@@ -63,12 +97,23 @@ if __name__ == "__main__":
 	# num_switches = 245
 	# num_ports = 14
 
-	ft_topo = topo.Fattree(num_ports)
-	jf_topo = topo.Jellyfish(num_servers, num_switches, num_ports)
-	ft_topo.generate()
-	jf_topo.generate()
-	ft_topo.plot()
-	jf_topo.plot()
-
-	# generateFigure1c(ft_topo, jf_topo)
-	
\ No newline at end of file
+	# a stored topology brings its own configuration
+	num_servers, num_switches, num_ports, seed = JF.stored_parameters(
+		args.topology, num_servers, num_switches, num_ports)
+
+	if args.plot:
+		# the drawing comes from the closed-form wiring, no nodes are built
+		topo.Fattree(num_ports).plot()
+
+	if args.topology:
+		jf_graph = JF.load_or_generate(
+			args.topology, num_servers, num_switches, num_ports, seed)
+	else:
+		jf_topo = topo.Jellyfish(num_servers, num_switches, num_ports)
+		jf_topo.generate()
+		if args.plot:
+			jf_topo.plot()
+		jf_graph = jf_topo.to_graph()
+
+	cache = ResultCache(args.cache_dir) if args.cache_dir else None
+	generateFigure1c(num_ports, jf_graph, cache)
@@ -16,60 +16,285 @@
 # under the License.
 
 import argparse
+import multiprocessing
+import os
+import pickle
 import random
-from collections import defaultdict, OrderedDict
-from itertools import tee
+from itertools import chain
 
 import matplotlib.pyplot as plt
+import numpy as np
 from jellyfish import *
+from resultcache import ResultCache, code_version
 from tqdm import tqdm
 
+# Graph shared read-only with forked sampling workers, and the path caches
+# of the current process.
+_graph = None
+_caches = None
 
-def pairwise(iterable):
-    a, b = tee(iterable)
-    next(b, None)
-    return zip(a, b)
+# Sources are split into this many blocks whatever the number of workers,
+# so the sampled pairs only depend on the seed.
+NUM_BLOCKS = 64
 
 
 def k_shortest_path_routing(paths, k):
     return [tuple(path) for path in paths[:k]]
 
 
-def k_way_equal_cost_multi_path_routing(paths, k):
-    result = [tuple(paths[0])]
-    for i in range(1, k):
-        if len(paths[i]) != len(paths[i - 1]):
-            return result
+def k_way_equal_cost_multi_path_routing(ecmp, source, sink, k):
+    return [tuple(path) for path in ecmp.find_paths(source, sink, k)]
 
-        result.append(tuple(paths[i]))
-    return result
 
+def count_num_of_paths_edge_is_on(graph, paths): # Link id -> # paths
+    """Count the paths on every link in one pass: all paths are flattened
+    into a single node array, hops across path boundaries are masked out,
+    and the link ids of the remaining hops are counted with bincount."""
+    paths = list(paths)
+    lengths = np.fromiter(map(len, paths), dtype=np.int64, count=len(paths))
+    nodes = np.fromiter(
+        chain.from_iterable(paths), dtype=np.int64, count=int(lengths.sum())
+    )
+    if len(nodes) < 2:
+        return np.zeros(graph.num_links, dtype=np.int64)
+
+    is_hop = np.ones(len(nodes) - 1, dtype=bool)
+    is_hop[np.cumsum(lengths)[:-1] - 1] = False
+    links = graph.link_ids(nodes[:-1][is_hop], nodes[1:][is_hop])
+    return np.bincount(links, minlength=graph.num_links)
+
+
+def merge_counts(counts_list):
+    return sum(counts_list)
+
+
+def split_samples(graph, num_samples, seed, num_blocks=NUM_BLOCKS):
+    """Assign every server to one of `num_blocks` blocks by its switch, and
+    draw the number of samples of every block from a multinomial over the
+    servers it owns. Every block gets its own random stream spawned from
+    `seed`.
 
-def count_num_of_paths_edge_is_on(paths): # Link -> # paths
-    result = defaultdict(int)
-    for path in paths:
-        for left_node, right_node in pairwise(path):
-            result[Edge(left_node, right_node)] += 1
-            result[Edge(right_node, left_node)] += 1
+    Sources never overlap between blocks, so a path found in one block is
+    never found in another and per-block distinct counts add up exactly.
+    Neither the blocks nor their streams depend on the number of workers.
+    """
+    owned = [[] for _ in range(num_blocks)]
+    for server in graph.servers.tolist():
+        owned[graph.switch_of(server) % num_blocks].append(server)
 
-    return result
+    children = np.random.SeedSequence(seed).spawn(num_blocks + 1)
+    sizes = np.array([len(sources) for sources in owned], dtype=np.float64)
+    shares = np.random.default_rng(children[0]).multinomial(
+        num_samples, sizes / sizes.sum()
+    )
+    seeds = [int(child.generate_state(1)[0]) for child in children[1:]]
+    return owned, shares.tolist(), seeds
+
+
+def sample_paths(
+    graph,
+    sources,
+    num_samples,
+    seed,
+    show_progress=False,
+    checkpoint=None,
+    resume=False,
+    checkpoint_every=1000,
+    cache=None,
+    ecmp=None,
+):
+    """Sample random server pairs with a source from `sources` and count the
+    distinct 8-shortest, 8-way ECMP and 64-way ECMP paths on every link.
+
+    With a `checkpoint` path, every `checkpoint_every` samples the RNG state,
+    the sample index and the paths first seen since the last record are
+    appended to it. With `resume` the records are replayed first and the
+    sampling goes on from the last one, with the same result as an
+    uninterrupted run.
+    """
+    rng = random.Random(seed)
+    cache = PathCache(graph) if cache is None else cache
+    ecmp = EcmpPaths(graph) if ecmp is None else ecmp
+    servers = graph.servers.tolist()
+    seen = (set(), set(), set())
+    fresh = ([], [], [])
+
+    start = 0
+    if checkpoint is not None:
+        header = {"sources": len(sources), "num_samples": num_samples, "seed": seed}
+        if resume and os.path.exists(checkpoint):
+            start = restore_checkpoint(checkpoint, header, rng, seen)
+        else:
+            with open(checkpoint, "wb") as f:
+                write_checkpoint_header(f, header)
+
+    samples = range(start, num_samples)
+    for index in tqdm(samples) if show_progress else samples:
+        server1 = rng.choice(sources)
+        while True:
+            server2 = rng.choice(servers)
+            if server1 != server2:
+                break
+
+        shortest_paths = cache.find_shortest_paths(server1, server2, 8)
+
+        routings = (
+            k_shortest_path_routing(shortest_paths, 8),
+            k_way_equal_cost_multi_path_routing(ecmp, server1, server2, 8),
+            k_way_equal_cost_multi_path_routing(ecmp, server1, server2, 64),
+        )
+        for paths, routing_seen, routing_fresh in zip(routings, seen, fresh):
+            if checkpoint is None:
+                routing_seen.update(paths)
+                continue
+            for path in paths:
+                if path not in routing_seen:
+                    routing_seen.add(path)
+                    routing_fresh.append(path)
+
+        done = index + 1
+        if checkpoint is not None and (
+            done % checkpoint_every == 0 or done == num_samples
+        ):
+            append_checkpoint(checkpoint, done, rng, fresh)
+            fresh = ([], [], [])
+
+    return tuple(count_num_of_paths_edge_is_on(graph, paths) for paths in seen)
+
+
+def _pack_paths(paths):
+    """Paths as one flat node array and their lengths."""
+    lengths = np.fromiter(map(len, paths), dtype=np.int32, count=len(paths))
+    nodes = np.fromiter(
+        chain.from_iterable(paths), dtype=np.int32, count=int(lengths.sum())
+    )
+    return lengths, nodes
+
+
+def _unpack_paths(packed):
+    lengths, nodes = packed
+    bounds = np.concatenate([[0], np.cumsum(lengths)]).tolist()
+    nodes = nodes.tolist()
+    return [tuple(nodes[a:b]) for a, b in zip(bounds, bounds[1:])]
+
+
+def write_checkpoint_header(f, header):
+    pickle.dump(header, f)
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def append_checkpoint(path, num_done, rng, fresh):
+    record = {
+        "num_done": num_done,
+        "rng": rng.getstate(),
+        "paths": [_pack_paths(paths) for paths in fresh],
+    }
+    with open(path, "ab") as f:
+        pickle.dump(record, f)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def restore_checkpoint(path, header, rng, seen):
+    """Replay the records of a checkpoint into `rng` and the `seen` path
+    sets and return the number of samples already done. A record cut off
+    by an interruption is dropped from the file, and a checkpoint whose
+    header was cut off is started over."""
+    num_done = 0
+    with open(path, "r+b") as f:
+        try:
+            stored = pickle.load(f)
+        except (EOFError, pickle.UnpicklingError):
+            f.seek(0)
+            f.truncate()
+            write_checkpoint_header(f, header)
+            return num_done
+        if stored != header:
+            raise ValueError(f"{path} belongs to a different run: {stored}")
+        end = f.tell()
+        while True:
+            try:
+                record = pickle.load(f)
+            except (EOFError, pickle.UnpicklingError):
+                break
+            for routing_seen, packed in zip(seen, record["paths"]):
+                routing_seen.update(_unpack_paths(packed))
+            rng.setstate(record["rng"])
+            num_done = record["num_done"]
+            end = f.tell()
+        f.truncate(end)
+    return num_done
+
+
+def _sample_paths_worker(task):
+    global _caches
+    if _caches is None:
+        _caches = (PathCache(_graph), EcmpPaths(_graph))
+    sources, num_samples, seed, checkpoint, resume = task
+    cache, ecmp = _caches
+    return sample_paths(
+        _graph,
+        sources,
+        num_samples,
+        seed,
+        checkpoint=checkpoint,
+        resume=resume,
+        cache=cache,
+        ecmp=ecmp,
+    )
 
 
-def gen_graph_points(num_edges, count_dict):
-    graph_points = {"rank": [0], "num_paths": [0]}
-    ordered_dict = OrderedDict(sorted(count_dict.items(), key=lambda x: x[1]))
+def run_samples(graph, num_samples, seed, processes=1, checkpoint=None, resume=False):
+    """Run the sampling blocks on `processes` forked workers and reduce their
+    link counters. The result only depends on `seed`. With a `checkpoint`
+    path, block i checkpoints to `checkpoint.i`."""
+    global _graph, _caches
+    _graph = graph
+    _caches = None
+
+    owned, shares, seeds = split_samples(graph, num_samples, seed)
+    tasks = [
+        (
+            owned[block],
+            shares[block],
+            seeds[block],
+            "{}.{}".format(checkpoint, block) if checkpoint else None,
+            resume,
+        )
+        for block in range(len(owned))
+        if shares[block]
+    ]
+
+    if processes == 1:
+        results = [_sample_paths_worker(task) for task in tqdm(tasks)]
+    else:
+        context = multiprocessing.get_context("fork")
+        with context.Pool(processes) as pool:
+            results = list(
+                tqdm(pool.imap(_sample_paths_worker, tasks), total=len(tasks))
+            )
+
+    return tuple(
+        merge_counts(result[routing] for result in results) for routing in range(3)
+    )
 
-    start_rank = num_edges - len(ordered_dict)
-    previous_num_paths = 0
 
-    graph_points["rank"].append(start_rank)
-    graph_points["num_paths"].append(previous_num_paths)
+def gen_graph_points(num_edges, edge_counts):
+    """Step curve of the number of paths per edge, edges ranked by count.
+    Edges on no path take the lowest ranks."""
+    counts = np.sort(edge_counts[edge_counts > 0])
+    start_rank = num_edges - len(counts)
 
-    for rank, (edge, num_paths) in enumerate(ordered_dict.items(), start_rank + 1):
-        if num_paths != previous_num_paths:
-            graph_points["rank"].append(rank)
-            graph_points["num_paths"].append(previous_num_paths)
-            previous_num_paths = num_paths
+    previous = np.concatenate([[0], counts[:-1]])
+    changes = np.flatnonzero(counts != previous)
+    graph_points = {
+        "rank": [0, start_rank] + (start_rank + 1 + changes).tolist(),
+        "num_paths": [0, 0] + previous[changes].tolist(),
+    }
+    if len(counts):
+        graph_points["rank"].append(num_edges)
+        graph_points["num_paths"].append(int(counts[-1]))
 
     return graph_points
 
@@ -87,45 +312,109 @@ def parse_args():
     parser.add_argument(
         "--num_samples", help="Number of samples to be performed", action="store", type=int, default=30
     )
+    parser.add_argument(
+        "--per_server",
+        help="Perform num_samples samples for every server",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--processes",
+        help="Number of worker processes",
+        action="store",
+        type=int,
+        default=multiprocessing.cpu_count(),
+    )
+    parser.add_argument(
+        "--seed", help="Master random seed", action="store", type=int, default=0
+    )
+    parser.add_argument(
+        "--checkpoint",
+        help="Path prefix of the per-worker sampling checkpoints",
+        action="store",
+        type=str,
+        default=None,
+    )
+    parser.add_argument(
+        "--resume",
+        help="Continue the sampling from the checkpoints",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--cache_dir",
+        help="Directory to memoize the link counts in",
+        action="store",
+        type=str,
+        default=None,
+    )
+    parser.add_argument(
+        "--topology",
+        help="Topology file to load, or to store the generated topology to",
+        action="store",
+        type=str,
+        default=None,
+    )
     return parser.parse_args()
 
 
 if __name__ == "__main__":
     args = parse_args()
-    num_servers = 686
-    num_switches = 245
-    num_ports = 14
+    # A stored topology brings its own configuration and seed.
+    num_servers, num_switches, num_ports, topology_seed = stored_parameters(
+        args.topology, 686, 245, 14, args.seed
+    )
 
     print("Generate Jellyfish topology...")
-    jellyfish = Jellyfish(num_servers, num_switches, num_ports)
-    jellyfish.generate()
-
-    num_samples = args.num_samples # * jellyfish.num_servers
+    graph = load_or_generate(
+        args.topology, num_servers, num_switches, num_ports, topology_seed
+    )
+    num_edges = 2 * graph.num_links
 
-    k_8, e_8, e_64 = set(), set(), set()
+    num_samples = args.num_samples
+    if args.per_server:
+        num_samples *= graph.num_servers
 
     print("Start random permutation...")
-    for _ in tqdm(range(num_samples)):
-        while True:
-            server1 = random.choice(jellyfish.servers)
-            server2 = random.choice(jellyfish.servers)
-            if server1 != server2:
-                break
-
-        shortest_paths = jellyfish.find_shortest_paths(server1, server2, 64)
-
-        k_8.update(k_shortest_path_routing(shortest_paths, 8))
-        e_8.update(k_way_equal_cost_multi_path_routing(shortest_paths, 8))
-        e_64.update(k_way_equal_cost_multi_path_routing(shortest_paths, 64))
-
-    print("Counting distinct edges...")
-    k_8_edges_count = count_num_of_paths_edge_is_on(k_8)
-    e_8_edges_count = count_num_of_paths_edge_is_on(e_8)
-    e_64_edges_count = count_num_of_paths_edge_is_on(e_64)
-
-    k_8_points = gen_graph_points(jellyfish.num_edges, k_8_edges_count)
-    e_8_points = gen_graph_points(jellyfish.num_edges, e_8_edges_count)
-    e_64_points = gen_graph_points(jellyfish.num_edges, e_64_edges_count)
+    def count_paths():
+        return run_samples(
+            graph,
+            num_samples,
+            args.seed,
+            args.processes,
+            checkpoint=args.checkpoint,
+            resume=args.resume,
+        )
+
+    if args.cache_dir:
+        # The counts come from this file's sampling code, which the default
+        # version of the cache does not cover.
+        version = code_version(
+            functions=(
+                k_shortest_path_routing,
+                k_way_equal_cost_multi_path_routing,
+                count_num_of_paths_edge_is_on,
+                merge_counts,
+                split_samples,
+                sample_paths,
+                _sample_paths_worker,
+                run_samples,
+            )
+        )
+        counts = ResultCache(args.cache_dir).memoize(
+            "reproduce_9",
+            graph,
+            count_paths,
+            version=version,
+            num_samples=num_samples,
+            seed=args.seed,
+        )
+    else:
+        counts = count_paths()
+    k_8_edges_count, e_8_edges_count, e_64_edges_count = counts
+
+    # Both directions of a link are on the same paths.
+    k_8_points = gen_graph_points(num_edges, np.repeat(k_8_edges_count, 2))
+    e_8_points = gen_graph_points(num_edges, np.repeat(e_8_edges_count, 2))
+    e_64_points = gen_graph_points(num_edges, np.repeat(e_64_edges_count, 2))
 
     print("Plotting...")
     plt.step(k_8_points["rank"], k_8_points["num_paths"], label="8 Shortest Paths")
@@ -0,0 +1,173 @@
+# Copyright 2021 Lin Wang
+
+# This code is part of the Advanced Computer Networks course at Vrije
+# Universiteit Amsterdam.
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import hashlib
+import inspect
+import json
+import os
+import pickle
+from typing import Any, Callable, Optional, Sequence
+
+from graph import Graph
+
+# Modules whose code determines the analysis results. Plotting code is left
+# out, so changing a figure does not invalidate the cache.
+ANALYSIS_MODULES = (
+    "graph",
+    "jellyfish",
+    "dynamic",
+    "linkload",
+    "routing",
+    "throughput",
+    "fairness",
+    "failures",
+    "topo",
+    "Utility",
+)
+
+
+def graph_digest(graph: "Graph") -> str:
+    """Hash of the topology arrays of a graph."""
+    digest = hashlib.sha256()
+    for array in (graph.offsets, graph.neighbors, graph.node_type, graph.node_index):
+        digest.update(str(array.dtype).encode())
+        digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def source_version(modules: Sequence[str] = ANALYSIS_MODULES) -> str:
+    """Hash of the source files of the given modules next to this one."""
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for module in modules:
+        with open(os.path.join(directory, module + ".py"), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def code_version(
+    modules: Sequence[str] = ANALYSIS_MODULES, functions: Sequence[Callable] = ()
+) -> str:
+    """Hash of the analysis modules and of the source of extra functions,
+    for results computed by code that lives next to plotting code."""
+    digest = hashlib.sha256(source_version(modules).encode())
+    for function in functions:
+        digest.update(inspect.getsource(function).encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Content-addressed on-disk memoization of analysis results.
+
+    A result is stored under the hash of the graph, the analysis name, its
+    parameters and the code version, so a changed topology, parameter or
+    analysis module never returns a stale result. Files are pickled and
+    written atomically. When the directory grows past `max_bytes`, the
+    least recently used files are evicted; a hit marks its file as used.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 1 << 30,
+        version: Optional[str] = None,
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.version = source_version() if version is None else version
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(
+        self,
+        name: str,
+        graph: Optional["Graph"] = None,
+        version: Optional[str] = None,
+        **params: Any,
+    ) -> str:
+        content = json.dumps(
+            {
+                "name": name,
+                "graph": graph_digest(graph) if graph is not None else None,
+                "params": params,
+                "version": self.version if version is None else version,
+            },
+            sort_keys=True,
+        )
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".pkl")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return default
+        os.utime(path)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+        self.evict()
+
+    def memoize(
+        self,
+        name: str,
+        graph: Optional["Graph"],
+        compute: Callable[[], Any],
+        version: Optional[str] = None,
+        **params: Any,
+    ) -> Any:
+        """Return the stored result of `compute`, or compute and store it.
+
+        `version` replaces the cache's code version for this result, see
+        `code_version`.
+        """
+        key = self.key(name, graph, version, **params)
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def evict(self) -> None:
+        """Drop least recently used files until the cache fits `max_bytes`."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pkl"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        size = sum(entry[1] for entry in entries)
+        for _, file_size, path in sorted(entries):
+            if size <= self.max_bytes:
+                break
+            os.remove(path)
+            size -= file_size
+
@@ -0,0 +1,343 @@
+# Copyright 2021 Lin Wang
+
+# This code is part of the Advanced Computer Networks course at Vrije
+# Universiteit Amsterdam.
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import scipy.sparse as sp
+
+from graph import Graph, bfs_distances
+from jellyfish import EcmpPaths, Topology
+
+SCHEMES = ("ecmp", "shortest")
+
+TrafficMatrix = Union[np.ndarray, sp.spmatrix]
+
+
+class RoutingMatrix:
+    """Sparse routing matrix of a topology under one routing scheme.
+
+    Entry (s * W + t, e) is the fraction of the traffic from switch s to
+    switch t that crosses directed edge e, for W switches. With "ecmp" the
+    traffic of a pair is split evenly over its equal-cost shortest paths, or
+    over the first k of them. With "shortest" it is split evenly over its k
+    shortest paths.
+
+    Servers are leaves, so rows are switch pairs: a server traffic matrix is
+    summed up per pair of switches before the product, and the server links
+    carry what their server sends and receives. Only switches with servers
+    get rows.
+    """
+
+    def __init__(
+        self,
+        graph: Union["Graph", "Topology"],
+        scheme: str = "ecmp",
+        k: Optional[int] = None,
+    ) -> None:
+        if isinstance(graph, Topology):
+            graph = graph.graph
+        if scheme not in SCHEMES:
+            raise ValueError("unknown routing scheme: {}".format(scheme))
+        if scheme == "shortest" and k is None:
+            raise ValueError("k shortest paths routing needs k")
+
+        self.graph = graph
+        self.scheme = scheme
+        self.k = k
+
+        switches = graph.servers_per_switch().astype(bool)
+        self.server_switches = graph.server_switches
+        if scheme == "ecmp":
+            rows, edge_ids, weights = _ecmp_entries(graph, np.flatnonzero(switches), k)
+        else:
+            # K shortest paths are symmetric, each unordered pair is searched
+            # once and routed both ways.
+            pairs = _switch_pairs(np.flatnonzero(switches), ordered=False)
+            rows, edge_ids, weights = _path_entries(
+                graph,
+                pairs,
+                lambda s, t: graph.k_shortest_paths(s, t, k),
+                both_ways=True,
+            )
+
+        num_switches = graph.num_switches
+        self.matrix = sp.csr_matrix(
+            (weights, (rows, edge_ids)),
+            shape=(num_switches * num_switches, 2 * graph.num_links),
+        )
+
+        servers = graph.servers
+        self._uplinks = graph.edge_ids(servers, self.server_switches)
+        self._downlinks = graph.edge_ids(self.server_switches, servers)
+
+    def switch_traffic(self, traffic: TrafficMatrix) -> sp.csr_matrix:
+        """See `switch_traffic`."""
+        return switch_traffic(self.graph, traffic)
+
+    def link_loads(
+        self, traffic: Union[TrafficMatrix, Sequence[TrafficMatrix]]
+    ) -> np.ndarray:
+        """Load of every directed edge for one or a batch of traffic matrices.
+
+        A traffic matrix is indexed by server in server id order. A batch of
+        B matrices, given as a list, is evaluated with one sparse product and gives a (B, E)
+        array for E directed edges.
+        """
+        batch = isinstance(traffic, (list, tuple))
+        matrices = list(traffic) if batch else [traffic]
+
+        num_pairs = self.matrix.shape[0]
+        columns = []
+        for matrix in matrices:
+            column = self.switch_traffic(matrix).tocoo()
+            columns.append(
+                sp.csr_matrix(
+                    (
+                        column.data,
+                        (
+                            column.row * self.graph.num_switches + column.col,
+                            np.zeros(column.nnz, dtype=np.int64),
+                        ),
+                    ),
+                    shape=(num_pairs, 1),
+                )
+            )
+        demands = sp.hstack(columns, format="csr") if columns else None
+
+        loads = np.zeros((len(matrices), self.matrix.shape[1]))
+        if demands is not None:
+            loads += (self.matrix.T @ demands).T.toarray()
+
+        for i, matrix in enumerate(matrices):
+            matrix = sp.csr_matrix(matrix)
+            local = matrix.diagonal()
+            loads[i, self._uplinks] += np.asarray(matrix.sum(axis=1)).ravel() - local
+            loads[i, self._downlinks] += np.asarray(matrix.sum(axis=0)).ravel() - local
+
+        return loads if batch else loads[0]
+
+
+def switch_traffic(
+    graph: Union["Graph", "Topology"], traffic: TrafficMatrix
+) -> sp.csr_matrix:
+    """Sum a server traffic matrix up to a switch traffic matrix.
+
+    Traffic between servers of the same switch never leaves it and is
+    dropped.
+    """
+    if isinstance(graph, Topology):
+        graph = graph.graph
+    server_switches = graph.server_switches
+    num_servers = len(server_switches)
+    membership = sp.csr_matrix(
+        (np.ones(num_servers), (np.arange(num_servers), server_switches)),
+        shape=(num_servers, graph.num_switches),
+    )
+    traffic = sp.csr_matrix(membership.T @ sp.csr_matrix(traffic) @ membership)
+    traffic.setdiag(0)
+    traffic.eliminate_zeros()
+    return traffic
+
+
+def _switch_pairs(
+    switches: np.ndarray, ordered: bool = True
+) -> Iterable[Tuple[int, int]]:
+    switches = switches.tolist()
+    return ((s, t) for s in switches for t in switches if s != t and (ordered or s < t))
+
+
+def _path_counts(adjacency: sp.csr_matrix, distances: np.ndarray) -> np.ndarray:
+    """Number of shortest paths between all pairs, one BFS level at a time."""
+    counts = (distances == 0).astype(np.float64)
+    for level in range(1, int(distances.max()) + 1):
+        frontier = counts * (distances == level - 1)
+        counts += adjacency.dot(frontier.T).T * (distances == level)
+    return counts
+
+
+def _ecmp_entries(
+    graph: "Graph", switches: np.ndarray, k: Optional[int]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Routing matrix entries for ECMP between the given switches.
+
+    Edge u->v is on a shortest s-t path iff d(s, u) + 1 + d(v, t) = d(s, t),
+    and a share n(s, u) * n(v, t) / n(s, t) of the n(s, t) paths cross it.
+    Pairs with more than k paths are routed over k listed paths instead.
+    """
+    num_switches = graph.num_switches
+    tails, heads, slot_ids = graph.switch_slots()
+
+    adjacency = graph.adjacency_matrix()[:num_switches, :num_switches]
+    distances = bfs_distances(adjacency, np.arange(num_switches)).astype(np.int64)
+    counts = _path_counts(adjacency, distances)
+
+    to_targets = distances[np.ix_(heads, switches)]
+    counts_to_targets = counts[np.ix_(heads, switches)]
+
+    rows, edge_ids, weights = [], [], []
+    bounded = []
+    for source in switches.tolist():
+        lengths = distances[source, switches]
+        num_paths = counts[source, switches]
+        routed = (lengths > 0) & ((num_paths <= k) if k is not None else True)
+        if k is not None:
+            bounded.extend(
+                (source, int(t)) for t in switches[(lengths > 0) & (num_paths > k)]
+            )
+
+        from_source = distances[source, tails]
+        on_path = (
+            (from_source[:, None] >= 0)
+            & (to_targets >= 0)
+            & (from_source[:, None] + 1 + to_targets == lengths[None, :])
+            & routed[None, :]
+        )
+        slots, targets = np.nonzero(on_path)
+        rows.append(source * num_switches + switches[targets])
+        edge_ids.append(slot_ids[slots])
+        weights.append(
+            counts[source, tails[slots]]
+            * counts_to_targets[slots, targets]
+            / num_paths[targets]
+        )
+
+    if bounded:
+        ecmp = EcmpPaths(graph)
+        entries = _path_entries(graph, bounded, lambda s, t: ecmp.find_paths(s, t, k))
+        for part, entry in zip((rows, edge_ids, weights), entries):
+            part.append(entry)
+
+    if not rows:
+        return (np.zeros(0, dtype=np.int64),) * 2 + (np.zeros(0),)
+    return np.concatenate(rows), np.concatenate(edge_ids), np.concatenate(weights)
+
+
+def _path_entries(
+    graph: "Graph",
+    pairs: Iterable[Tuple[int, int]],
+    find_paths: Callable[[int, int], List[List[int]]],
+    both_ways: bool = False,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Routing matrix entries for pairs split evenly over listed paths.
+
+    With `both_ways`, the reversed paths also route the reversed pair.
+    """
+    num_switches = graph.num_switches
+    rows, tails, heads, weights = [], [], [], []
+    for source, sink in pairs:
+        paths = find_paths(source, sink)
+        for path in paths:
+            num_hops = len(path) - 1
+            rows.extend([source * num_switches + sink] * num_hops)
+            tails.extend(path[:-1])
+            heads.extend(path[1:])
+            weights.extend([1 / len(paths)] * num_hops)
+            if both_ways:
+                rows.extend([sink * num_switches + source] * num_hops)
+                tails.extend(path[1:])
+                heads.extend(path[:-1])
+                weights.extend([1 / len(paths)] * num_hops)
+
+    tails = np.array(tails, dtype=np.int64)
+    heads = np.array(heads, dtype=np.int64)
+    if not len(tails):
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+    return np.array(rows, dtype=np.int64), graph.edge_ids(tails, heads), np.array(weights)
+
+
+def all_to_all(num_servers: int) -> sp.csr_matrix:
+    """Every server sends one unit spread evenly over all other servers."""
+    traffic = np.full((num_servers, num_servers), 1 / max(num_servers - 1, 1))
+    np.fill_diagonal(traffic, 0)
+    return sp.csr_matrix(traffic)
+
+
+def permutation(num_servers: int, seed: Optional[int] = None) -> sp.csr_matrix:
+    """Every server sends one unit to a distinct random server other than itself."""
+    rng = np.random.default_rng(seed)
+    sinks = rng.permutation(num_servers)
+    # Swap every fixed point with the next server to get a derangement.
+    for server in np.flatnonzero(sinks == np.arange(num_servers)).tolist():
+        other = (server + 1) % num_servers
+        sinks[server], sinks[other] = sinks[other], sinks[server]
+    return sp.csr_matrix(
+        (np.ones(num_servers), (np.arange(num_servers), sinks)),
+        shape=(num_servers, num_servers),
+    )
+
+
+def hotspot(
+    num_servers: int, num_hotspots: int, seed: Optional[int] = None
+) -> sp.csr_matrix:
+    """Every server sends one unit to one of a few random hotspot servers."""
+    rng = np.random.default_rng(seed)
+    hotspots = rng.choice(num_servers, size=num_hotspots, replace=False)
+    sinks = hotspots[rng.integers(num_hotspots, size=num_servers)]
+    # A hotspot drawn as its own sink sends to the next hotspot instead.
+    for server in np.flatnonzero(sinks == np.arange(num_servers)).tolist():
+        sinks[server] = hotspots[
+            (np.flatnonzero(hotspots == server)[0] + 1) % num_hotspots
+        ]
+
+    sources = np.arange(num_servers)
+    keep = sinks != sources
+    return sp.csr_matrix(
+        (np.ones(keep.sum()), (sources[keep], sinks[keep])),
+        shape=(num_servers, num_servers),
+    )
+
+
+def rack_local(
+    graph: Union["Graph", "Topology"], locality: float, seed: Optional[int] = None
+) -> sp.csr_matrix:
+    """Every server sends one unit, `locality` of it spread evenly over the
+    servers of its own switch and the rest to a random server elsewhere."""
+    if isinstance(graph, Topology):
+        graph = graph.graph
+    rng = np.random.default_rng(seed)
+    server_switches = graph.server_switches.astype(np.int64)
+    num_servers = len(server_switches)
+    order = np.argsort(server_switches, kind="stable")
+
+    sources, sinks, rates = [], [], []
+    racks = np.split(order, np.cumsum(np.bincount(server_switches))[:-1])
+    for rack in racks:
+        if len(rack) < 2:
+            continue
+        rack_sources = np.repeat(rack, len(rack))
+        rack_sinks = np.tile(rack, len(rack))
+        local = rack_sources != rack_sinks
+        sources.append(rack_sources[local])
+        sinks.append(rack_sinks[local])
+        rates.append(np.full(local.sum(), locality / (len(rack) - 1)))
+
+    remote = rng.integers(num_servers, size=num_servers)
+    for server in range(num_servers):
+        while server_switches[remote[server]] == server_switches[server]:
+            if np.all(server_switches == server_switches[server]):
+                break
+            remote[server] = rng.integers(num_servers)
+    elsewhere = server_switches[remote] != server_switches
+    sources.append(np.flatnonzero(elsewhere))
+    sinks.append(remote[elsewhere])
+    rates.append(np.full(elsewhere.sum(), 1 - locality))
+
+    return sp.csr_matrix(
+        (np.concatenate(rates), (np.concatenate(sources), np.concatenate(sinks))),
+        shape=(num_servers, num_servers),
+    )
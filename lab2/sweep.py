@@ -0,0 +1,186 @@
+# Copyright 2021 Lin Wang
+
+# This code is part of the Advanced Computer Networks course at Vrije
+# Universiteit Amsterdam.
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+import time
+
+import numpy as np
+from tqdm import tqdm
+
+import Utility as ut
+from fairness import permutation_throughput
+from jellyfish import load_or_generate
+from routing import SCHEMES
+
+COLUMNS = (
+    "num_servers",
+    "num_switches",
+    "num_ports",
+    "seed",
+    "scheme",
+    "k",
+    "mean_path_length",
+    "diameter",
+    "disconnected_pairs",
+    "mean_rate",
+    "min_rate",
+    "seconds",
+)
+
+
+def cell_name(cell):
+    return "{}_{}_{}_{}_{}_{}.json".format(*cell)
+
+
+def run_cell(cell):
+    """Generate the Jellyfish of one grid cell and measure its server path
+    lengths and its max-min fair permutation throughput under the cell's
+    routing scheme."""
+    num_servers, num_switches, num_ports, seed, scheme, k = cell
+    start = time.time()
+    graph = load_or_generate(None, num_servers, num_switches, num_ports, seed)
+
+    histogram = ut.switchPathLengthHistogram(graph)
+    lengths = np.arange(len(histogram.counts))
+    rates = permutation_throughput(graph, scheme, k, split=True, seed=seed)
+
+    return dict(
+        zip(COLUMNS, cell),
+        mean_path_length=float(lengths @ histogram.counts / max(histogram.total, 1)),
+        diameter=int(np.flatnonzero(histogram.counts)[-1]) if histogram.total else 0,
+        disconnected_pairs=histogram.unreachable,
+        mean_rate=float(rates.mean()),
+        min_rate=float(rates.min()),
+        seconds=time.time() - start,
+    )
+
+
+def _run_and_store(task):
+    cell, cache_dir = task
+    row = run_cell(cell)
+    # Write then rename, so an interrupted run never leaves a partial cell.
+    path = os.path.join(cache_dir, cell_name(cell))
+    with open(path + ".tmp", "w") as f:
+        json.dump(row, f)
+    os.replace(path + ".tmp", path)
+    return row
+
+
+def run_sweep(cells, cache_dir, processes=1):
+    """Run every cell not yet stored in `cache_dir` on `processes` workers
+    and return the rows of all cells, in grid order."""
+    os.makedirs(cache_dir, exist_ok=True)
+    pending = [
+        (cell, cache_dir)
+        for cell in cells
+        if not os.path.exists(os.path.join(cache_dir, cell_name(cell)))
+    ]
+
+    if processes == 1:
+        for task in tqdm(pending):
+            _run_and_store(task)
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            for _ in tqdm(pool.imap_unordered(_run_and_store, pending), total=len(pending)):
+                pass
+
+    rows = []
+    for cell in cells:
+        with open(os.path.join(cache_dir, cell_name(cell))) as f:
+            rows.append(json.load(f))
+    return rows
+
+
+def write_table(rows, path):
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def parse_config(text):
+    num_servers, num_switches, num_ports = map(int, text.split(","))
+    return num_servers, num_switches, num_ports
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        usage="Usage: python sweep.py --configs --seeds --schemes --k --output"
+    )
+    parser.add_argument(
+        "--configs",
+        help="Topologies as num_servers,num_switches,num_ports",
+        action="store",
+        type=parse_config,
+        nargs="+",
+        default=[(16, 20, 4), (432, 180, 12), (686, 245, 14)],
+    )
+    parser.add_argument(
+        "--seeds", help="Topology seeds", action="store", type=int, nargs="+", default=[0]
+    )
+    parser.add_argument(
+        "--schemes",
+        help="Routing schemes",
+        action="store",
+        choices=SCHEMES,
+        nargs="+",
+        default=list(SCHEMES),
+    )
+    parser.add_argument(
+        "--k", help="Number of paths per flow", action="store", type=int, default=8
+    )
+    parser.add_argument(
+        "--processes",
+        help="Number of worker processes",
+        action="store",
+        type=int,
+        default=multiprocessing.cpu_count(),
+    )
+    parser.add_argument(
+        "--cache_dir",
+        help="Directory holding the results of completed cells",
+        action="store",
+        type=str,
+        default="sweep_cells",
+    )
+    parser.add_argument(
+        "--output",
+        help="Result table path",
+        action="store",
+        type=str,
+        default="sweep.csv",
+    )
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    cells = [
+        config + (seed, scheme, args.k)
+        for config, seed, scheme in itertools.product(
+            args.configs, args.seeds, args.schemes
+        )
+    ]
+
+    print("Running {} cells...".format(len(cells)))
+    rows = run_sweep(cells, args.cache_dir, args.processes)
+    write_table(rows, args.output)
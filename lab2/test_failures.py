@@ -0,0 +1,78 @@
+# Copyright 2021 Lin Wang
+
+# This code is part of the Advanced Computer Networks course at Vrije
+# Universiteit Amsterdam.
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Failure sweeps checked against a search on the surviving network."""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from failures import failure_sweep  # noqa: E402
+from graph import Graph  # noqa: E402
+from jellyfish import load_or_generate  # noqa: E402
+from Utility import serverPathLengthHistogram  # noqa: E402
+
+FRACTIONS = [0.0, 0.1, 0.3, 0.6, 1.0]
+
+
+@pytest.fixture(scope="module")
+def graph():
+    return load_or_generate(None, 60, 20, 6, 0)
+
+
+def surviving_histograms(graph, kind, seed):
+    """Fail the same elements in the same order as failure_sweep, rebuild
+    the graph without them and search it from every server."""
+    links = [tuple(link) for link in graph.links.tolist()]
+    num_switches = graph.num_switches
+    if kind == "link":
+        order = [link for link in links if link[1] < num_switches]
+    else:
+        order = list(range(num_switches))
+    random.Random(seed).shuffle(order)
+
+    for fraction in FRACTIONS:
+        failed = set(order[: int(round(fraction * len(order)))])
+        if kind == "link":
+            alive = [link for link in links if link not in failed]
+        else:
+            alive = [link for link in links if not failed & set(link)]
+        survivor = Graph.from_edges(graph.node_type, graph.node_index, alive)
+        yield serverPathLengthHistogram(survivor)
+
+
+@pytest.mark.parametrize("kind", ["link", "switch"])
+def test_failure_sweep_matches_search(graph, kind):
+    results = failure_sweep(graph, FRACTIONS, kind, seed=5)
+    expected = surviving_histograms(graph, kind, 5)
+    num_pairs = graph.num_servers * (graph.num_servers - 1)
+    for (fraction, disconnected, histogram), reference in zip(results, expected):
+        assert histogram.tolist() == reference.tolist()
+        assert histogram.unreachable == reference.unreachable
+        assert disconnected == pytest.approx(reference.unreachable / num_pairs)
+
+    assert results[0][1] == 0
+    assert [result[1] for result in results] == sorted(result[1] for result in results)
+
+
+def test_unknown_kind_is_rejected(graph):
+    with pytest.raises(ValueError):
+        failure_sweep(graph, FRACTIONS, "server")
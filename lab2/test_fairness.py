@@ -0,0 +1,73 @@
+# Copyright 2021 Lin Wang
+
+# This code is part of the Advanced Computer Networks course at Vrije
+# Universiteit Amsterdam.
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Max-min fair rates on hand-made and random flow sets."""
+
+import os
+import sys
+from collections import defaultdict
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fairness import flow_paths, max_min_fair_rates  # noqa: E402
+from jellyfish import load_or_generate  # noqa: E402
+from routing import permutation  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def graph():
+    return load_or_generate(None, 60, 20, 6, 0)
+
+
+def test_small_flow_sets(graph):
+    assert max_min_fair_rates(graph, []).tolist() == []
+    assert max_min_fair_rates(graph, [[]]).tolist() == [0]
+
+    servers = graph.servers.tolist()
+    path = graph.shortest_path(servers[0], servers[-1])
+    np.testing.assert_allclose(max_min_fair_rates(graph, [[path], [path]]), [0.5, 0.5])
+    np.testing.assert_allclose(max_min_fair_rates(graph, [[path], []], 2.0), [2.0, 0])
+
+
+@pytest.mark.parametrize("scheme", ["shortest", "ecmp"])
+def test_single_path_rates_are_max_min_fair(graph, scheme):
+    """Every flow is capped by a saturated link on which no flow is faster,
+    which is the defining property of max-min fairness."""
+    sources, sinks, _ = sp.find(permutation(graph.num_servers, 3))
+    servers = graph.servers
+    pairs = list(zip(servers[sources].tolist(), servers[sinks].tolist()))
+    flows = flow_paths(graph, pairs, scheme, k=8, split=False, seed=3)
+    rates = max_min_fair_rates(graph, flows)
+
+    edges = [graph.edge_ids(path[:-1], path[1:]).tolist() for (path,) in flows]
+    load = defaultdict(float)
+    fastest = defaultdict(float)
+    for rate, flow_edges in zip(rates, edges):
+        for edge in flow_edges:
+            load[edge] += rate
+            fastest[edge] = max(fastest[edge], rate)
+
+    assert max(load.values()) <= 1 + 1e-9
+    for rate, flow_edges in zip(rates, edges):
+        assert any(
+            load[edge] >= 1 - 1e-9 and fastest[edge] <= rate + 1e-9
+            for edge in flow_edges
+        )
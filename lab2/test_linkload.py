@@ -0,0 +1,61 @@
+# Copyright 2021 Lin Wang
+
+# This code is part of the Advanced Computer Networks course at Vrije
+# Universiteit Amsterdam.
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Exact ECMP link loads checked against explicit path enumeration."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from jellyfish import EcmpPaths, load_or_generate  # noqa: E402
+from linkload import ecmp_link_load  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def graph():
+    return load_or_generate(None, 40, 20, 6, 0)
+
+
+def enumerated_load(graph, k):
+    """Walk every equal-cost path of every ordered server pair."""
+    ecmp = EcmpPaths(graph)
+    load = np.zeros(2 * graph.num_links)
+    servers = graph.servers.tolist()
+    for source in servers:
+        for sink in servers:
+            if source == sink:
+                continue
+            paths = ecmp.find_paths(source, sink, k)
+            for path in paths:
+                load[graph.edge_ids(path[:-1], path[1:])] += 1 / len(paths)
+    return load
+
+
+@pytest.mark.parametrize("k", [None, 1, 2, 8])
+def test_ecmp_link_load_matches_enumeration(graph, k):
+    expected = enumerated_load(graph, k)
+    np.testing.assert_allclose(ecmp_link_load(graph, k), expected, atol=1e-9)
+
+
+def test_ecmp_link_load_is_the_same_on_workers(graph):
+    np.testing.assert_allclose(
+        ecmp_link_load(graph, 2, processes=3), ecmp_link_load(graph, 2), atol=1e-9
+    )
@@ -0,0 +1,161 @@
+# Copyright 2021 Lin Wang
+
+# This code is part of the Advanced Computer Networks course at Vrije
+# Universiteit Amsterdam.
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Path searches checked against networkx and brute force.
+
+Run with `python -m pytest -q` from lab2.
+"""
+
+import os
+import random
+import sys
+from itertools import islice
+
+import networkx as nx
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from dynamic import DynamicDistances  # noqa: E402
+from jellyfish import EcmpPaths, Edge, Jellyfish  # noqa: E402
+from topo import FattreeModel  # noqa: E402
+
+
+def to_networkx(graph):
+    nx_graph = nx.Graph()
+    nx_graph.add_nodes_from(range(graph.num_nodes))
+    for u in range(graph.num_nodes):
+        nx_graph.add_edges_from((u, int(v)) for v in graph.adjacent(u))
+    return nx_graph
+
+
+def random_pairs(graph, count, seed):
+    rng = random.Random(seed)
+    nodes = list(range(graph.num_nodes))
+    return [tuple(rng.sample(nodes, 2)) for _ in range(count)]
+
+
+@pytest.fixture(scope="module")
+def jellyfish():
+    topology = Jellyfish(32, 20, 6, seed=0)
+    topology.generate()
+    return topology.graph
+
+
+def test_find_shortest_path_excludes_one_direction():
+    topology = Jellyfish(32, 20, 6, seed=0)
+    topology.generate()
+    left = topology.switches[0]
+    right = left.linked_switches[0]
+
+    excluded = {Edge(left, right)}
+    assert topology.find_shortest_path(right, left, excluded) == [right, left]
+    detour = topology.find_shortest_path(left, right, excluded)
+    assert detour[0] == left and detour[-1] == right and len(detour) > 2
+
+
+@pytest.mark.parametrize("k", [1, 4, 16])
+def test_k_shortest_paths_match_networkx(jellyfish, k):
+    nx_graph = to_networkx(jellyfish)
+    for source, sink in random_pairs(jellyfish, 30, k):
+        paths = jellyfish.k_shortest_paths(source, sink, k)
+        expected = list(islice(nx.shortest_simple_paths(nx_graph, source, sink), k))
+
+        assert [len(path) for path in paths] == [len(path) for path in expected]
+        assert len({tuple(path) for path in paths}) == len(paths)
+        for path in paths:
+            assert path[0] == source and path[-1] == sink
+            assert len(set(path)) == len(path)
+            assert all(nx_graph.has_edge(u, v) for u, v in zip(path, path[1:]))
+
+
+def test_shortest_path_dag_matches_networkx(jellyfish):
+    nx_graph = to_networkx(jellyfish)
+    for sink in jellyfish.switches.tolist():
+        dag = jellyfish.shortest_path_dag(sink)
+        for source in jellyfish.switches.tolist():
+            expected = {tuple(path) for path in nx.all_shortest_paths(nx_graph, source, sink)}
+            paths = {tuple(path) for path in dag.paths(source)}
+            assert paths == expected
+            assert dag.num_paths[source] == len(expected)
+            assert len(list(dag.paths(source, 3))) == min(3, len(expected))
+
+
+def test_ecmp_paths_match_networkx(jellyfish):
+    nx_graph = to_networkx(jellyfish)
+    ecmp = EcmpPaths(jellyfish)
+    for source, sink in random_pairs(jellyfish, 50, 1):
+        expected = {tuple(path) for path in nx.all_shortest_paths(nx_graph, source, sink)}
+        assert ecmp.num_paths(source, sink) == len(expected)
+        assert {tuple(path) for path in ecmp.find_paths(source, sink, 64)} == expected
+
+
+@pytest.mark.parametrize("num_ports", [4, 6, 8])
+def test_fattree_model_matches_its_graph(num_ports):
+    model = FattreeModel(num_ports)
+    graph = model.to_graph()
+    nx_graph = to_networkx(graph)
+    servers = graph.servers.tolist()
+    assert graph.num_switches == model.num_switches
+    assert graph.num_servers == model.num_servers
+
+    lengths = dict(nx.all_pairs_shortest_path_length(nx_graph))
+    counts = {}
+    for source in servers:
+        for sink in servers:
+            distance = lengths[source][sink]
+            assert model.distance(source, sink) == distance
+            if source != sink:
+                counts[distance] = counts.get(distance, 0) + 1
+    assert model.pair_counts() == counts
+
+    for source, sink in random.Random(num_ports).sample(
+        [(u, v) for u in servers for v in servers], 40
+    ):
+        expected = {tuple(path) for path in nx.all_shortest_paths(nx_graph, source, sink)}
+        assert model.num_paths(source, sink) == len(expected)
+        assert {tuple(path) for path in model.find_paths(source, sink)} == expected
+        assert len(model.find_paths(source, sink, 2)) == min(2, len(expected))
+
+
+def test_dynamic_distances_match_recomputation(jellyfish):
+    rng = random.Random(0)
+    distances = DynamicDistances(jellyfish)
+    switches = jellyfish.switches
+    num_switches = jellyfish.num_switches
+    links = [tuple(link) for link in jellyfish.links.tolist() if link[1] < num_switches]
+    removed = []
+
+    for step in range(60):
+        if removed and rng.random() < 0.4:
+            u, v = removed.pop(rng.randrange(len(removed)))
+            distances.add_link(u, v)
+            links.append((u, v))
+        else:
+            u, v = links.pop(rng.randrange(len(links)))
+            distances.remove_link(u, v)
+            removed.append((u, v))
+
+        nx_graph = nx.Graph()
+        nx_graph.add_nodes_from(switches.tolist())
+        nx_graph.add_edges_from(links)
+        expected = np.full((num_switches, num_switches), -1)
+        for source, row in nx.all_pairs_shortest_path_length(nx_graph):
+            for sink, distance in row.items():
+                expected[source, sink] = distance
+        assert (distances.matrix == expected).all(), step
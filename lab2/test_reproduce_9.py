@@ -0,0 +1,85 @@
+# Copyright 2021 Lin Wang
+
+# This code is part of the Advanced Computer Networks course at Vrije
+# Universiteit Amsterdam.
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Sampling of reproduce_9.py: worker independence and checkpoints."""
+
+import os
+import pickle
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from jellyfish import load_or_generate  # noqa: E402
+from reproduce_9 import run_samples, sample_paths  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def graph():
+    return load_or_generate(None, 32, 20, 6, 0)
+
+
+def assert_same_counts(first, second):
+    assert len(first) == len(second) == 3
+    for a, b in zip(first, second):
+        assert (a == b).all()
+
+
+def test_counts_do_not_depend_on_the_worker_count(graph):
+    single = run_samples(graph, 300, 7, processes=1)
+    assert_same_counts(single, run_samples(graph, 300, 7, processes=3))
+    assert any((a != b).any() for a, b in zip(single, run_samples(graph, 300, 8)))
+
+
+@pytest.mark.parametrize("cut", ["empty", "in header", "after header", "in record"])
+def test_truncated_checkpoint_resumes_like_an_uninterrupted_run(graph, tmp_path, cut):
+    sources = graph.servers.tolist()[:12]
+    expected = sample_paths(graph, sources, 50, 3)
+
+    checkpoint = str(tmp_path / "checkpoint")
+    sample_paths(graph, sources, 50, 3, checkpoint=checkpoint, checkpoint_every=10)
+    with open(checkpoint, "r+b") as f:
+        pickle.load(f)
+        header_size = f.tell()
+        size = {
+            "empty": 0,
+            "in header": header_size // 2,
+            "after header": header_size,
+            "in record": os.path.getsize(checkpoint) - 7,
+        }[cut]
+        f.truncate(size)
+
+    resumed = sample_paths(
+        graph, sources, 50, 3, checkpoint=checkpoint, resume=True, checkpoint_every=10
+    )
+    assert_same_counts(expected, resumed)
+
+
+def test_checkpoint_of_another_run_is_refused(graph, tmp_path):
+    sources = graph.servers.tolist()[:12]
+    checkpoint = str(tmp_path / "checkpoint")
+    sample_paths(graph, sources, 20, 3, checkpoint=checkpoint)
+    with pytest.raises(ValueError):
+        sample_paths(graph, sources, 20, 4, checkpoint=checkpoint, resume=True)
+
+
+def test_blocks_resume_from_their_checkpoints(graph, tmp_path):
+    checkpoint = str(tmp_path / "run")
+    expected = run_samples(graph, 200, 9, checkpoint=checkpoint)
+    resumed = run_samples(graph, 200, 9, checkpoint=checkpoint, resume=True)
+    assert_same_counts(expected, resumed)
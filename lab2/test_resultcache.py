@@ -0,0 +1,64 @@
+# Copyright 2021 Lin Wang
+
+# This code is part of the Advanced Computer Networks course at Vrije
+# Universiteit Amsterdam.
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""On-disk result cache."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from jellyfish import load_or_generate  # noqa: E402
+from resultcache import ANALYSIS_MODULES, ResultCache, code_version  # noqa: E402
+
+
+def test_memoize_keys_on_graph_params_and_version(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    graph = load_or_generate(None, 16, 8, 4, 0)
+    other = load_or_generate(None, 16, 8, 4, 1)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return len(calls)
+
+    assert cache.memoize("count", graph, compute, k=1) == 1
+    assert cache.memoize("count", graph, compute, k=1) == 1
+    assert cache.memoize("count", graph, compute, k=2) == 2
+    assert cache.memoize("count", other, compute, k=1) == 3
+    assert cache.memoize("count", graph, compute, version="edited", k=1) == 4
+    assert (cache.hits, cache.misses) == (1, 4)
+
+    assert code_version(functions=(compute,)) != code_version()
+    here = os.path.dirname(os.path.abspath(__file__))
+    for module in ANALYSIS_MODULES:
+        assert os.path.exists(os.path.join(here, module + ".py"))
+
+
+def test_least_recently_used_results_are_evicted(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=2500)
+    cache.put(cache.key("a"), bytes(1000))
+    cache.put(cache.key("b"), bytes(1000))
+    # Age both files, then read a, so b is the least recently used.
+    for name in ("a", "b"):
+        os.utime(cache._path(cache.key(name)), (0, 0))
+    assert cache.get(cache.key("a")) is not None
+
+    cache.put(cache.key("c"), bytes(1000))
+    assert cache.get(cache.key("a")) is not None
+    assert cache.get(cache.key("b")) is None
+    assert cache.get(cache.key("c")) is not None
@@ -0,0 +1,64 @@
+# Copyright 2021 Lin Wang
+
+# This code is part of the Advanced Computer Networks course at Vrije
+# Universiteit Amsterdam.
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Degree-preserving rewiring of Jellyfish instances."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from graph import Graph  # noqa: E402
+from jellyfish import RewiringSampler, load_or_generate  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def graph():
+    return load_or_generate(None, 200, 80, 8, 0)
+
+
+def switch_links(graph):
+    links = graph.links
+    return {tuple(link) for link in links[links[:, 1] < graph.num_switches].tolist()}
+
+
+def test_samples_keep_degrees_and_servers(graph):
+    original = switch_links(graph)
+    for sample in RewiringSampler(graph, seed=1).samples(3):
+        assert (sample.offsets == graph.offsets).all()
+        assert (sample.server_switches == graph.server_switches).all()
+
+        adjacency = sample.adjacency_matrix()
+        assert (adjacency != adjacency.T).nnz == 0
+        assert adjacency.diagonal().sum() == 0
+        assert adjacency.max() == 1
+
+        rebuilt = Graph.from_edges(sample.node_type, sample.node_index, sample.links)
+        assert (rebuilt.neighbors == sample.neighbors).all()
+
+        links = switch_links(sample)
+        assert len(links) == len(original)
+        assert len(links & original) < 0.2 * len(original)
+
+
+def test_samples_depend_only_on_the_seed(graph):
+    first = RewiringSampler(graph, seed=4).samples(2)
+    second = RewiringSampler(graph, seed=4).samples(2)
+    for a, b in zip(first, second):
+        assert (a.neighbors == b.neighbors).all()
@@ -0,0 +1,104 @@
+# Copyright 2021 Lin Wang
+
+# This code is part of the Advanced Computer Networks course at Vrije
+# Universiteit Amsterdam.
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Routing matrices checked against exact loads and explicit paths."""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+import scipy.sparse as sp
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from jellyfish import load_or_generate  # noqa: E402
+from linkload import ecmp_link_load  # noqa: E402
+from routing import (  # noqa: E402
+    RoutingMatrix,
+    all_to_all,
+    hotspot,
+    permutation,
+    rack_local,
+)
+
+
+@pytest.fixture(scope="module")
+def graph():
+    return load_or_generate(None, 60, 20, 6, 0)
+
+
+def test_edge_ids_and_switch_slots(graph):
+    tails, heads = graph.links[:, 0], graph.links[:, 1]
+    expected = [graph.edge_id(u, v) for u, v in zip(tails.tolist(), heads.tolist())]
+    assert graph.edge_ids(tails, heads).tolist() == expected
+    assert graph.edge_ids(heads, tails).tolist() == [edge ^ 1 for edge in expected]
+
+    slot_tails, slot_heads, slot_edges = graph.switch_slots()
+    switch_links = graph.links[graph.links[:, 1] < graph.num_switches]
+    assert len(slot_edges) == 2 * len(switch_links)
+    assert sorted(slot_edges.tolist()) == sorted(
+        graph.edge_ids(
+            np.concatenate([switch_links[:, 0], switch_links[:, 1]]),
+            np.concatenate([switch_links[:, 1], switch_links[:, 0]]),
+        ).tolist()
+    )
+    assert (graph.edge_ids(slot_tails, slot_heads) == slot_edges).all()
+
+
+@pytest.mark.parametrize("k", [None, 2])
+def test_ecmp_matrix_matches_exact_link_load(graph, k):
+    loads = RoutingMatrix(graph, "ecmp", k).link_loads(all_to_all(graph.num_servers))
+    np.testing.assert_allclose(
+        loads * (graph.num_servers - 1), ecmp_link_load(graph, k), atol=1e-9
+    )
+
+
+def test_shortest_matrix_matches_explicit_paths(graph):
+    traffic = permutation(graph.num_servers, 1)
+    expected = np.zeros(2 * graph.num_links)
+    servers = graph.servers
+    for source, sink, rate in zip(*sp.find(traffic)):
+        source, sink = int(servers[source]), int(servers[sink])
+        first, last = graph.switch_of(source), graph.switch_of(sink)
+        if first == last:
+            paths = [[first]]
+        elif first < last:
+            paths = graph.k_shortest_paths(first, last, 4)
+        else:
+            # The matrix searches every unordered pair once, from its lower id.
+            paths = [path[::-1] for path in graph.k_shortest_paths(last, first, 4)]
+        for path in paths:
+            path = [source] + path + [sink]
+            expected[graph.edge_ids(path[:-1], path[1:])] += rate / len(paths)
+
+    loads = RoutingMatrix(graph, "shortest", 4).link_loads(traffic)
+    np.testing.assert_allclose(loads, expected, atol=1e-9)
+
+
+def test_batch_matches_single_matrices(graph):
+    routing = RoutingMatrix(graph, "ecmp", 8)
+    num_servers = graph.num_servers
+    batch = [
+        permutation(num_servers, 2),
+        hotspot(num_servers, 3, 2),
+        rack_local(graph, 0.5, 2),
+    ]
+    loads = routing.link_loads(batch)
+    assert loads.shape == (3, 2 * graph.num_links)
+    for row, traffic in zip(loads, batch):
+        np.testing.assert_allclose(row, routing.link_loads(traffic))
@@ -0,0 +1,63 @@
+# Copyright 2021 Lin Wang
+
+# This code is part of the Advanced Computer Networks course at Vrije
+# Universiteit Amsterdam.
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Max concurrent flow: Garg-Koenemann against the exact LP."""
+
+import math
+import os
+import sys
+
+import pytest
+import scipy.sparse as sp
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from jellyfish import load_or_generate  # noqa: E402
+from routing import hotspot, permutation  # noqa: E402
+from throughput import max_concurrent_flow  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def graph():
+    return load_or_generate(None, 60, 20, 6, 0)
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+@pytest.mark.parametrize("epsilon", [0.05, 0.1, 0.2])
+def test_approx_is_within_epsilon_of_the_lp(graph, seed, epsilon):
+    traffic = permutation(graph.num_servers, seed)
+    exact = max_concurrent_flow(graph, traffic, "lp")
+    approx = max_concurrent_flow(graph, traffic, "approx", epsilon=epsilon)
+    assert (1 - epsilon) * exact <= approx <= exact * (1 + 1e-6)
+
+
+def test_busiest_server_bounds_the_fraction(graph):
+    traffic = hotspot(graph.num_servers, 2, 0)
+    busiest = traffic.sum(axis=0).max()
+    for method in ("lp", "approx"):
+        assert max_concurrent_flow(graph, traffic, method) <= 1 / busiest + 1e-9
+    empty = sp.csr_matrix((graph.num_servers, graph.num_servers))
+    assert max_concurrent_flow(graph, empty) == math.inf
+
+
+def test_bad_arguments_are_rejected(graph):
+    traffic = permutation(graph.num_servers, 1)
+    with pytest.raises(ValueError):
+        max_concurrent_flow(graph, traffic, "simplex")
+    for epsilon in (0, 1, -0.5):
+        with pytest.raises(ValueError):
+            max_concurrent_flow(graph, traffic, "approx", epsilon=epsilon)
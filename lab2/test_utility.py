@@ -0,0 +1,42 @@
+# Copyright 2021 Lin Wang
+
+# This code is part of the Advanced Computer Networks course at Vrije
+# Universiteit Amsterdam.
+
+# Licensed under the Apache License, Version 2.0 (the "License"); you may not
+# use this file except in compliance with the License. You may obtain a copy
+# of the License at
+
+#   http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""Path length histograms of Utility.py."""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import Utility as ut  # noqa: E402
+
+
+def test_empty_lengths_give_an_empty_histogram():
+    assert ut.statisticPathResult([]) == [0] * 10
+    assert ut.PathLengthHistogram().add(np.zeros((0, 3))).total == 0
+
+
+def test_histogram_counts_weights_and_unreachable_pairs():
+    histogram = ut.PathLengthHistogram().add([2, 4, -1, 4], [1, 2, 5, 3])
+    assert histogram.tolist(6) == [0, 0, 1, 0, 5, 0]
+    assert histogram.unreachable == 5
+
+    merged = ut.PathLengthHistogram().add([[6, 2]]).merge(histogram)
+    assert merged.tolist(8) == [0, 0, 2, 0, 5, 0, 1, 0]
+    assert merged.total == 8
@@ -19,12 +19,14 @@ import os
 import sys
 import random
 import queue
-from mininet.topo import Topo
+from itertools import islice
+
+import numpy as np
 
 scriptpath = "../lab2/"
 sys.path.append(os.path.abspath(scriptpath))
-import TopoVisualize
 import jellyfish as JF
+from graph import SERVER, SWITCH, Graph
 
 
 # Class for an edge in the graph
@@ -91,106 +93,207 @@ class Jellyfish:
         self.switchList.extend(self.jf.switches_with_free_ports)
         self.switchList.extend(self.jf.switches_without_free_ports)
 
+    def to_graph(self):
+        return self.jf.graph
+
+    def save(self, path):
+        self.jf.save(path)
+
     def plot(self):
         self.jf.plot('Figures/jellyfish.png')
 
 
-
-class Fattree(Topo):
+# Closed-form model of the fat-tree built by Fattree.generate. Node ids are
+# those of Fattree.to_graph: core, aggregation and edge switches, then the
+# servers, so answers can be checked against the graph. Nothing is built,
+# every query is O(1) or O(paths).
+class FattreeModel:
 
     def __init__(self, num_ports):
+        self.num_ports = num_ports
+        self.half = num_ports // 2
+        self.num_core = self.half ** 2
+        self.num_agg = num_ports * self.half
+        self.num_edge = self.num_agg
+        self.num_switches = self.num_core + self.num_agg + self.num_edge
+        self.num_servers = num_ports ** 3 // 4
+
+    # Core switch `index` of `group`; group g is wired to aggregation switch g of every pod
+    def core_switch(self, group, index):
+        return group * self.half + index
+
+    def agg_switch(self, pod, index):
+        return self.num_core + pod * self.half + index
+
+    def edge_switch(self, pod, index):
+        return self.num_core + self.num_agg + pod * self.half + index
+
+    def server(self, pod, edge, port):
+        return self.num_switches + (pod * self.half + edge) * self.half + port
+
+    # Pod, edge switch index and port of a server node id
+    def locate(self, server):
+        index = server - self.num_switches
+        return index // self.half ** 2, index // self.half % self.half, index % self.half
+
+    # Hop distance between two servers: 2 on the same edge switch, 4 in the
+    # same pod, 6 across pods
+    def distance(self, source, sink):
+        if source == sink:
+            return 0
+        source_pod, source_edge, _ = self.locate(source)
+        sink_pod, sink_edge, _ = self.locate(sink)
+        if source_pod != sink_pod:
+            return 6
+        if source_edge != sink_edge:
+            return 4
+        return 2
+
+    # Number of equal-cost shortest paths between two servers
+    def num_paths(self, source, sink):
+        return {0: 1, 2: 1, 4: self.half, 6: self.half ** 2}[self.distance(source, sink)]
+
+    # Equal-cost shortest paths between two servers as node id lists, in
+    # the order of the aggregation switch, then the core switch
+    def paths(self, source, sink):
+        if source == sink:
+            yield [source]
+            return
+
+        source_pod, source_edge, _ = self.locate(source)
+        sink_pod, sink_edge, _ = self.locate(sink)
+        first = self.edge_switch(source_pod, source_edge)
+        last = self.edge_switch(sink_pod, sink_edge)
+        if first == last:
+            yield [source, first, sink]
+            return
+
+        for agg in range(self.half):
+            if source_pod == sink_pod:
+                yield [source, first, self.agg_switch(source_pod, agg), last, sink]
+                continue
+            for core in range(self.half):
+                yield [
+                    source,
+                    first,
+                    self.agg_switch(source_pod, agg),
+                    self.core_switch(agg, core),
+                    self.agg_switch(sink_pod, agg),
+                    last,
+                    sink,
+                ]
+
+    # Up to k equal-cost shortest paths, like EcmpPaths.find_paths
+    def find_paths(self, source, sink, k=None):
+        return list(islice(self.paths(source, sink), k))
+
+    # Mininet name of a node id, as Fattree.generate has always named them
+    def name(self, node):
+        if node < self.num_core:
+            return 'c{}'.format(node)
+        if node < self.num_core + self.num_agg:
+            return 'a{}'.format(node - self.num_core)
+        if node < self.num_switches:
+            return 'e{}'.format(node - self.num_core - self.num_agg)
+        pod, edge, port = self.locate(node)
+        return 'h10_{}_{}_{}'.format(pod, edge, port + 2)
+
+    # All links as an (L, 2) array of node ids: core-aggregation,
+    # aggregation-edge, then edge-server
+    def links(self):
+        half, pods = self.half, self.num_ports
+        group, index, pod = np.meshgrid(
+            np.arange(half), np.arange(half), np.arange(pods), indexing='ij'
+        )
+        core_agg = np.stack(
+            [self.core_switch(group, index), self.agg_switch(pod, group)], axis=-1
+        ).reshape(-1, 2)
+
+        pod, agg, edge = np.meshgrid(
+            np.arange(pods), np.arange(half), np.arange(half), indexing='ij'
+        )
+        agg_edge = np.stack(
+            [self.agg_switch(pod, agg), self.edge_switch(pod, edge)], axis=-1
+        ).reshape(-1, 2)
+
+        servers = np.arange(self.num_servers)
+        edge_server = np.stack(
+            [self.num_core + self.num_agg + servers // half, self.num_switches + servers],
+            axis=-1,
+        )
+        return np.concatenate([core_agg, agg_edge, edge_server])
+
+    # Analysis graph straight from the closed-form wiring, without node objects
+    def to_graph(self, nodes=None):
+        node_type = [SWITCH] * self.num_switches + [SERVER] * self.num_servers
+        node_index = list(range(self.num_switches)) + list(range(self.num_servers))
+        return Graph.from_edges(node_type, node_index, self.links(), nodes)
 
-        Topo.__init__(self)
+    # Number of ordered server pairs per path length
+    def pair_counts(self):
+        same_edge = self.half - 1
+        same_pod = (self.half - 1) * self.half
+        other_pods = (self.num_ports - 1) * self.half ** 2
+        return {
+            2: self.num_servers * same_edge,
+            4: self.num_servers * same_pod,
+            6: self.num_servers * other_pods,
+        }
+
+
+
+# Fat-tree with k = num_ports. Analysis only needs to_graph, which works
+# from FattreeModel alone; generate builds the node objects, and Mininet
+# and the plot are only imported by to_mininet and plot.
+class Fattree:
+
+    def __init__(self, num_ports):
         self.servers = []
         self.switchList = []
-        self.G = TopoVisualize.TopoVisualize()
         self.num_ports = num_ports
-        
-    def generate(self):
+        self.model = FattreeModel(num_ports)
 
-        pod = self.num_ports
-        core_sw_count = (pod//2)**2
-        agg_sw_count = pod*pod//2
-        edge_sw_count = agg_sw_count
-        server_count = pod**3//4
-
-        # generate core switch
-        _cnt = 0
-        for j in range(pod//2):
-            for i in range(pod//2):
-                # sw = self.addSwitch('c10_{}_{}_{}'.format(pod, j+1, i+1))
-                sw = self.addSwitch('c{}'.format(_cnt))
-                _cnt += 1
-                swNode = Node(sw, 'switch')
-                self.switchList.append(swNode)
-
-        # generate aggregation switch
-        _cnt = 0
-        for p in range(pod):
-            for i in range(pod//2):
-                # sw = self.addSwitch('a10_{}_{}_1'.format(p, i+(pod//2)))
-                sw = self.addSwitch('a{}'.format(_cnt))
-                _cnt += 1
-                swNode = Node(sw, 'switch')
-                self.switchList.append(swNode)
-
-        # generate edge switch
-        _cnt = 0
-        for p in range(pod):
-            for i in range(pod//2):
-                # sw = self.addSwitch('e10_{}_{}_1'.format(p, i))
-                sw = self.addSwitch('e{}'.format(_cnt))
-                _cnt += 1
-                swNode = Node(sw, 'switch')
-                self.switchList.append(swNode)
-
-        # generate links bwtween core sw and aggregation sw
-        cnt = 0
-        start = 0
-        for core in range(core_sw_count):
-            if cnt==pod//2:
-                start = start + 1
-                cnt = 0
-            for port in range(pod):
-                co = self.switchList[core]
-                agg = self.switchList[core_sw_count + port*pod//2 + start]
-                self.addLink(co.id, agg.id)
-                self.G.addEdge([co.id, agg.id])
-
-                co.add_edge(agg)
-                agg.add_edge(co)
-
-            cnt = cnt+1
-
-        # generate links between aggregation sw and edge sw
-        for _pod in range(pod):
-            for agg in range(pod//2):
-                for port in range(pod//2):
-                    a = self.switchList[core_sw_count + _pod*pod//2 + agg]
-                    edge = self.switchList[core_sw_count + agg_sw_count + _pod*pod//2 + port]
-                    self.addLink(a.id, edge.id)
-                    self.G.addEdge([a.id, edge.id])
-
-                    a.add_edge(edge)
-                    edge.add_edge(a)
-
-
-        # generate links between server and edge sw
-        for _pod in range(pod):
-            for edge in range(pod//2):
-                for port in range(pod//2):
-                    e = self.switchList[core_sw_count + agg_sw_count + _pod*pod//2 + edge]
-                    serverID = self.addHost('h10_{}_{}_{}'.format(_pod, edge, port+2))
-                    server = Node(serverID, 'server')
-                    self.addLink(e.id, server.id)
-                    self.G.addEdge([e.id, server.id])
-
-                    e.add_edge(server)
-                    server.add_edge(a)
-                    self.servers.append(server)
+    def generate(self):
+        model = self.model
+        nodes = [
+            Node(model.name(u), 'switch' if u < model.num_switches else 'server')
+            for u in range(model.num_switches + model.num_servers)
+        ]
+        self.switchList = nodes[: model.num_switches]
+        self.servers = nodes[model.num_switches :]
+
+        for u, v in model.links().tolist():
+            nodes[u].add_edge(nodes[v])
+
+    def to_graph(self):
+        nodes = self.switchList + self.servers
+        return self.model.to_graph(nodes or None)
+
+    # Mininet topology with the same switches, hosts and links
+    def to_mininet(self):
+        from mininet.topo import Topo
+
+        model = self.model
+        net_topo = Topo()
+        for u in range(model.num_switches):
+            net_topo.addSwitch(model.name(u))
+        for u in range(model.num_switches, model.num_switches + model.num_servers):
+            net_topo.addHost(model.name(u))
+        for u, v in model.links().tolist():
+            net_topo.addLink(model.name(u), model.name(v))
+        return net_topo
+
+    def save(self, path):
+        self.to_graph().save(path, kind="fattree", num_ports=self.num_ports)
 
     def plot(self):
-        self.G.draw()
+        import TopoVisualize
+
+        model = self.model
+        G = TopoVisualize.TopoVisualize()
+        for u, v in model.links().tolist():
+            G.addEdge([model.name(u), model.name(v)])
+        G.draw()
 
 
-# topos = {"fatTreeTopo":(lambda:Fattree(4))}
\ No newline at end of file
+# topos = {"fatTreeTopo":(lambda:Fattree(4).to_mininet())}
\ No newline at end of file